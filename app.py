@@ -2,11 +2,15 @@ import streamlit as st
 # Force reload
 
 import pandas as pd
+import numpy as np
 import pickle
 import os
-import time
 from src.features import calculate_features
-from src.weather_loader import fetch_forecast
+from src.weather_loader import fetch_forecast, prefetch_forecasts, FORECAST_TTL
+from src.jobs import TrainingJobs
+from src.what_if import odds_sensitivity, market_shift_grid, margin_grid
+from src.publish import load_current
+from src.pair_matrix import materialize
 
 
 # Page Config
@@ -26,22 +30,35 @@ if league_code == 'B1':
 else:
     st.caption("Using Advanced Model with xG (Expected Goals).")
 
+def read_pickle(path):
+    with open(path, 'rb') as f:
+        return pickle.load(f)
+
 # Load Model
 def load_model(code):
+    # Published snapshots are cached per process and swapped in when a new
+    # version is published (e.g. by a background retrain), without a restart
+    model = load_current(f'model_{code}', 'model.pkl', read_pickle)
+    if model is not None:
+        return model
+    
     path = f'models/model_{code}.pkl'
     # Fallback for old model name if upgrading
     if not os.path.exists(path) and code == 'E0' and os.path.exists('models/xgb_model.pkl'):
         path = 'models/xgb_model.pkl'
         
     if os.path.exists(path):
-        with open(path, 'rb') as f:
-            return pickle.load(f)
+        return read_pickle(path)
     return None
 
 model = load_model(league_code)
 
 # Load Data
 def load_data(code):
+    df = load_current(f'merged_{code}', 'merged.csv', pd.read_csv)
+    if df is not None:
+        return df
+    
     path = f'data/merged_{code}.csv'
     # Fallback
     if not os.path.exists(path) and code == 'E0' and os.path.exists('data/merged_data.csv'):
@@ -64,41 +81,38 @@ with st.sidebar:
     
 
 
-# Handle Retraining
+# Background Retraining
+# One job queue for the whole server, so sessions share (and deduplicate) retrains
+@st.cache_resource
+def get_training_jobs():
+    return TrainingJobs()
+
+training_jobs = get_training_jobs()
+understat_league = 'EPL' if league_code == 'E0' else None
+
 if st.session_state.get('retrain_needed'):
-    with st.status("Retraining model...", expanded=True) as status:
-        st.write("DEBUG: Starting retraining process...")
-        try:
-            st.write("Importing modules...")
-            from src.data_loader import merge_data
-            from src.features import calculate_features
-            from src.model import train_model
-            
-            st.write("Downloading and merging data...")
-            # Force data reload
-            understat_league = 'EPL' if league_code == 'E0' else None
-            merge_data(league_code, understat_league)
-            
-            st.write("Loading new data...")
-            df = pd.read_csv(f'data/merged_{league_code}.csv')
-            
-            st.write("Calculating features...")
-            df_processed = calculate_features(df)
-            
-            st.write("Training model...")
-            train_model(df_processed, league_code)
-            
-            status.update(label="Model retrained successfully!", state="complete", expanded=False)
-            st.success("Done! Reloading app...")
-            st.session_state['retrain_needed'] = False
-            time.sleep(1)
+    training_jobs.submit(league_code, understat_league)
+    st.session_state['retrain_needed'] = False
+
+@st.fragment(run_every=2)
+def show_training_status():
+    job = training_jobs.status(league_code)
+    seen_key = f'training_seen_{league_code}'
+    
+    if job['state'] == 'running':
+        st.session_state[seen_key] = True
+        st.info(f"🔄 Retraining {selected_league_name} model in the background: {job.get('step', '')}")
+        if model is not None:
+            st.caption("Predictions use the current model until the new one is ready.")
+    elif st.session_state.get(seen_key):
+        # First run after the job finished: reload the app to pick up the new model
+        st.session_state[seen_key] = False
+        if job['state'] == 'failed':
+            st.error(f"Error during retraining: {job.get('error')}")
+        else:
             st.rerun()
-        except Exception as e:
-            st.error(f"Error during retraining: {e}")
-            status.update(label="Retraining failed", state="error")
-            st.session_state['retrain_needed'] = False
-            st.stop()
 
+show_training_status()
 
 
 if model is None or df is None or 'Season' not in df.columns:
@@ -108,38 +122,27 @@ if model is None or df is None or 'Season' not in df.columns:
         
     st.warning(f"⚠️ Model or Data for {selected_league_name} not found or invalid.")
     
-    if st.button(f"Train {selected_league_name} Model Now", type="primary"):
-        with st.spinner("Downloading data and training model..."):
-            try:
-                # Import pipeline components
-                from src.data_loader import merge_data
-                from src.features import calculate_features
-                from src.model import train_model
-                
-                # Ensure directories exist
-                os.makedirs('data', exist_ok=True)
-                os.makedirs('models', exist_ok=True)
-                
-                # Run Pipeline
-                st.write("Step 1/3: Downloading & Merging Data...")
-                understat_league = 'EPL' if league_code == 'E0' else None
-                merge_data(league_code, understat_league)
-                df = pd.read_csv(f'data/merged_{league_code}.csv')
-                
-                st.write("Step 2/3: Engineering Features...")
-                df_processed = calculate_features(df)
-                
-                st.write("Step 3/3: Training Model...")
-                train_model(df_processed, league_code)
-                
-                st.success("Done! Refreshing...")
-                st.rerun()
-            except Exception as e:
-                st.error(f"An error occurred: {e}")
+    if not training_jobs.is_running(league_code):
+        if st.button(f"Train {selected_league_name} Model Now", type="primary"):
+            # Ensure directories exist
+            os.makedirs('data', exist_ok=True)
+            os.makedirs('models', exist_ok=True)
+            
+            training_jobs.submit(league_code, understat_league)
+            st.rerun()
     st.stop()
 
 # Team Selection
 teams = sorted(df['HomeTeam'].unique())
+
+# Warm the forecast cache for the next two weeks (one request per stadium, in the background)
+@st.cache_resource(ttl=FORECAST_TTL)
+def start_forecast_prefetch(code, teams):
+    today = pd.Timestamp.now().normalize()
+    days = [(today + pd.Timedelta(days=i)).strftime('%Y-%m-%d') for i in range(14)]
+    return prefetch_forecasts([(team, day) for team in teams for day in days], background=True)
+
+start_forecast_prefetch(league_code, tuple(teams))
 col1, col2 = st.columns(2)
 
 with col1:
@@ -172,22 +175,33 @@ if st.button("Predict Outcome", type="primary"):
         
     st.info(f"**Weather Forecast**: 🌡️ {forecast['Temperature']}°C | 🌧️ {forecast['Rain']}mm | 💨 {forecast['WindSpeed']}km/h")
     
-    # Add dummy xG if needed (only if we plan to use it)
-    # We will let calculate_features handle it, but we need to know if the model expects it.
-    # For now, we provide it for EPL, but we will filter features later based on the model.
-    if league_code == 'E0':
-        dummy_row['Home_xG'] = 1.3
-        dummy_row['Away_xG'] = 1.1
+    # Upcoming fixtures are a lookup in the precomputed all-pairs matrix (rebuilt
+    # here only if the model or team form changed since it was last built)
+    pairs = None
+    match_features = None
+    if pd.Timestamp(selected_date) > pd.to_datetime(df['Date'], format='mixed').max():
+        pairs = materialize(league_code)
+        if pairs is not None:
+            match_features = pairs.features(home_team, away_team)
     
-    # Append to df to calculate features
-    df_with_dummy = pd.concat([df, pd.DataFrame([dummy_row])], ignore_index=True)
-    
-    # Recalculate features
-    with st.spinner("Calculating recent form..."):
-        df_processed = calculate_features(df_with_dummy)
-    
-    # Get the last row
-    match_features = df_processed.iloc[[-1]]
+    if match_features is None:
+        # Add dummy xG if needed (only if we plan to use it)
+        # We will let calculate_features handle it, but we need to know if the model expects it.
+        # For now, we provide it for EPL, but we will filter features later based on the model.
+        if league_code == 'E0':
+            dummy_row['Home_xG'] = 1.3
+            dummy_row['Away_xG'] = 1.1
+        
+        # Append to df to calculate features
+        df_with_dummy = pd.concat([df, pd.DataFrame([dummy_row])], ignore_index=True)
+        
+        # Recalculate features
+        with st.spinner("Calculating recent form..."):
+            df_processed = calculate_features(df_with_dummy)
+        
+        # Get the last row
+        match_features = df_processed.iloc[[-1]]
+        pairs = None
     
     # Features required (Must match training)
     base_features = [
@@ -250,8 +264,11 @@ if st.button("Predict Outcome", type="primary"):
     X = match_features[features]
     
     # Predict
-    probs = model.predict_proba(X)[0]
-    prediction = model.predict(X)[0]
+    if pairs is not None:
+        probs = pairs.lookup(home_team, away_team)
+    else:
+        probs = model.predict_proba(X)[0]
+    prediction = int(probs.argmax())
     
     # Display Results
     st.divider()
@@ -304,3 +321,22 @@ if st.button("Predict Outcome", type="primary"):
         f'{away_team}': away_vals
     })
     st.table(stats_df.set_index('Metric'))
+    
+    # Odds Sensitivity (the placeholder odds above are model inputs too)
+    with st.expander("📈 Odds Sensitivity"):
+        st.caption("How the prediction moves with the market: home price from 1.2 to 10, draw at 3.40, "
+                   "away price set so the bookmaker keeps a 5% margin. All scenarios are scored in one batch.")
+        shift = odds_sensitivity(model, X, market_shift_grid(np.linspace(1.2, 10, 200), draw_odds=3.4, margin=0.05))
+        shift = shift.set_index('B365H')
+        
+        st.write("**Probabilities**")
+        st.line_chart(shift[['Prob_H', 'Prob_D', 'Prob_A']].rename(
+            columns={'Prob_H': home_team, 'Prob_D': 'Draw', 'Prob_A': away_team}))
+        st.write("**Edge (expected return per unit staked)**")
+        st.line_chart(shift[['Edge_H', 'Edge_D', 'Edge_A']].rename(
+            columns={'Edge_H': home_team, 'Edge_D': 'Draw', 'Edge_A': away_team}))
+        
+        st.write("**Edge at the model's own prices with a bookmaker margin**")
+        margins = odds_sensitivity(model, X, margin_grid(probs, np.linspace(0, 0.10, 6)))
+        margins['Margin'] = (margins['Book_Margin'] * 100).round(1).astype(str) + '%'
+        st.dataframe(margins.set_index('Margin')[['B365H', 'B365D', 'B365A', 'Edge_H', 'Edge_D', 'Edge_A']].round(3))
@@ -0,0 +1,24 @@
+import statistics
+import subprocess
+import sys
+import time
+
+# End-to-end wall time of the predict.py CLI (interpreter start-up included).
+# Run from the repo root after main.py has written the model and form snapshot:
+#   python benchmarks/bench_predict_cli.py [runs]
+
+def main(runs=10):
+    cmd = [sys.executable, 'predict.py', 'Arsenal', 'Liverpool']
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL)
+        timings.append(time.perf_counter() - start)
+
+    print(f"predict.py over {runs} runs:")
+    print(f"  median: {statistics.median(timings) * 1000:.0f} ms")
+    print(f"  min:    {min(timings) * 1000:.0f} ms")
+    print(f"  max:    {max(timings) * 1000:.0f} ms")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10)
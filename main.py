@@ -1,29 +1,150 @@
-import pandas as pd
-from src.data_loader import download_data, fetch_understat_data, merge_data
-from src.features import calculate_features
-from src.model import train_model, evaluate_betting_strategy
+from src.pipeline import Pipeline
 import os
+import sys
 
-def main():
-    print("Step 1: Loading Data...")
-    if os.path.exists('data/merged_data.csv'):
-        df = pd.read_csv('data/merged_data.csv')
-    else:
-        # Ensure we have the data
-        merge_data()
-        df = pd.read_csv('data/merged_data.csv')
-        
-    print(f"Loaded {len(df)} matches.")
+LEGACY_DATA = 'data/merged_data.csv'
+
+# --- Pipeline stages: download -> merge -> features -> train -> pairs / evaluate ---
+# Each stage imports what it runs, so a run where everything is up to date
+# never loads pandas, scikit-learn or xgboost
+
+def download_stage(league_code, understat_league):
+    from src.data_loader import download_data, fetch_understat_data
+
+    results = download_data(league=league_code)
+    xg = fetch_understat_data(league=understat_league) if understat_league else None
+    return results, xg
+
+def merge_stage(raw, league_code, understat_league):
+    from src.data_loader import merge_data
+
+    return merge_data(league_code, understat_league)
+
+def load_stage(path):
+    import pandas as pd
 
-    print("\nStep 2: Feature Engineering...")
-    df_processed = calculate_features(df)
+    return pd.read_csv(path)
+
+def features_stage(df, league_code, h2h):
+    from src.features import calculate_features, save_team_form
+    from src.h2h_index import add_h2h_features
+
+    print(f"Loaded {len(df)} matches.")
+    df_processed = calculate_features(df.copy())
+    if h2h:
+        # Meetings and venue form count every match, including those without a full form window
+        df_processed, _ = add_h2h_features(df_processed, history=df)
     print(f"Processed data shape: {df_processed.shape}")
-    
-    print("\nStep 3: Training Gradient Boosting Model...")
-    model, X_test, y_test, y_prob = train_model(df_processed)
-    
-    print("\nStep 4: Evaluating Strategy...")
-    evaluate_betting_strategy(X_test, y_test, y_prob)
+    save_team_form(df, league_code)
+    return df_processed
+
+def train_stage(df_processed, league_code, ensemble, memory_budget=None):
+    if ensemble:
+        from src.ensemble import train_ensemble
+        print("Training Stacked Ensemble...")
+        return train_ensemble(df_processed, league_code)
+    if memory_budget is not None:
+        from src.lean_training import train_model_lean
+        print("Training Gradient Boosting Model (memory-lean)...")
+        return train_model_lean(df_processed, league_code, memory_budget=memory_budget)
+    from src.model import train_model
+    print("Training Gradient Boosting Model...")
+    return train_model(df_processed, league_code)
+
+def pairs_stage(df_processed, trained, league_code):
+    # Every home/away fixture for the app and predict.py, from the published model and team form
+    from src.pair_matrix import materialize
+
+    matrix = materialize(league_code)
+    return None if matrix is None else matrix.fingerprint
+
+def evaluate_stage(df_processed, trained):
+    from src.model import evaluate_betting_strategy, matchweeks
+    from src.bootstrap import bootstrap_ci
+
+    model, X_test, y_test, y_prob = trained
+    rounds = matchweeks(df_processed.loc[X_test.index, 'Date'])
+    flat_bankroll, ledger = evaluate_betting_strategy(X_test, y_test, y_prob, rounds=rounds, return_ledger=True)
+    ci = bootstrap_ci(ledger, rounds=rounds, y_true=y_test, y_prob=y_prob)
+
+    # Same bets sized with fractional Kelly, one matchweek at a time
+    kelly_bankroll = evaluate_betting_strategy(X_test, y_test, y_prob, staking='kelly', rounds=rounds)
+    return {'flat_bankroll': flat_bankroll, 'kelly_bankroll': kelly_bankroll, 'bootstrap_ci': ci}
+
+def model_code(league_code, h2h=False):
+    # H2H columns cannot be built from the team form snapshot that predict.py, the app
+    # and the pair matrix score from, so that model is kept apart from the default one
+    return f'{league_code}_h2h' if h2h else league_code
+
+def build_pipeline(league_code='E0', understat_league='EPL', ensemble=False, h2h=False, memory_budget=None):
+    pipeline = Pipeline()
+
+    if league_code == 'E0' and os.path.exists(LEGACY_DATA):
+        # Use the bundled data; it is re-read only when its contents change
+        pipeline.stage('merge', load_stage, params={'path': LEGACY_DATA}, inputs=[LEGACY_DATA])
+    else:
+        from src.http_client import RESULTS_MAX_AGE
+
+        # Downloads are re-checked once they are older than RESULTS_MAX_AGE
+        pipeline.stage('download', download_stage, ttl=RESULTS_MAX_AGE,
+                       params={'league_code': league_code, 'understat_league': understat_league})
+        pipeline.stage('merge', merge_stage, deps=['download'],
+                       params={'league_code': league_code, 'understat_league': understat_league},
+                       outputs=[f'data/merged_{league_code}.csv'])
+
+    pipeline.stage('features', features_stage, deps=['merge'],
+                   params={'league_code': league_code, 'h2h': h2h},
+                   outputs=[f'data/team_form_{league_code}.json'],
+                   code=['src.features', 'src.h2h_index'])
+    code = model_code(league_code, h2h)
+    model_file = f'models/ensemble_{code}.pkl' if ensemble else f'models/model_{code}.pkl'
+    pipeline.stage('train', train_stage, deps=['features'],
+                   params={'league_code': code, 'ensemble': ensemble, 'memory_budget': memory_budget},
+                   outputs=[model_file],
+                   code=['src.model', 'src.ensemble', 'src.lean_training'])
+    if not (h2h or ensemble):
+        # The matrix is built from model_{league}.npz, which only a plain HGB run writes
+        pipeline.stage('pairs', pairs_stage, deps=['features', 'train'],
+                       params={'league_code': league_code},
+                       outputs=[f'models/pairs_{league_code}.npz'],
+                       code=['src.pair_matrix'])
+    pipeline.stage('evaluate', evaluate_stage, deps=['features', 'train'],
+                   code=['src.model', 'src.bootstrap', 'src.staking'])
+    return pipeline
+
+def main(incremental=False, ensemble=False, h2h=False, force=False, memory_budget=None):
+    if incremental and ensemble:
+        print("--update only applies to the gradient boosting model; run --ensemble without it.")
+        return
+
+    pipeline = build_pipeline(ensemble=ensemble, h2h=h2h, memory_budget=memory_budget)
+
+    if incremental:
+        from src.model import update_model
+        from src.pair_matrix import materialize
+
+        print("Step 1-2: Loading Data & Feature Engineering...")
+        pipeline.run(['features'], force=pipeline.stages if force else ())
+        print("\nStep 3: Incremental Model Update...")
+        # --h2h updates model_E0_h2h, which the pair matrix is not built from
+        update_model(pipeline.load('features'), model_code('E0', h2h))
+        if not h2h:
+            materialize('E0')
+        return
+
+    # Only stages whose inputs, parameters or code changed are rerun
+    pipeline.run(force=pipeline.stages if force else ())
+
+    results = pipeline.load('evaluate')
+    print(f"\nFlat staking final bankroll: {results['flat_bankroll']:.2f}")
+    print(f"Kelly staking final bankroll: {results['kelly_bankroll']:.2f}")
 
 if __name__ == "__main__":
-    main()
+    # python main.py --update: warm-start weekly update instead of a full retrain
+    # python main.py --ensemble: stacked ensemble of several model families
+    # python main.py --h2h: add head-to-head and venue form features (saved as model_E0_h2h)
+    # python main.py --force: rerun every stage, ignoring the pipeline cache
+    # python main.py --memory-budget=2048: memory-lean training within ~2048 MB
+    budget = next((int(arg.split('=', 1)[1]) * 2**20 for arg in sys.argv if arg.startswith('--memory-budget=')), None)
+    main(incremental='--update' in sys.argv, ensemble='--ensemble' in sys.argv,
+         h2h='--h2h' in sys.argv, force='--force' in sys.argv, memory_budget=budget)
@@ -1,12 +1,87 @@
-import pandas as pd
-import pickle
+import json
+import os
 import sys
-from src.features import calculate_features
+
+# Heavy libraries (pandas, sklearn) are only imported on the slow path below,
+# so the common case starts in a fraction of a second.
+
+OUTCOMES = ['Home Win', 'Draw', 'Away Win']
+
+def print_prediction(home_team, away_team, probs):
+    prediction = max(range(3), key=lambda i: probs[i])
+
+    print(f"\nPrediction for {home_team} vs {away_team}:")
+    print(f"Predicted Outcome: {OUTCOMES[prediction]}")
+    print(f"Probabilities:")
+    print(f"  Home Win: {probs[0]:.1%}")
+    print(f"  Draw:     {probs[1]:.1%}")
+    print(f"  Away Win: {probs[2]:.1%}")
+
+    print(f"\n(Note: Odds used for prediction were defaults: 2.0/3.0/4.0. Actual odds may vary model output if included as features.)")
+
+def predict_match_fast(home_team, away_team, league_code='E0'):
+    """
+    Scores a fixture from the per-team form snapshot and the compact model
+    (both written by main.py). Returns False if those files are missing.
+    Fixtures in an up-to-date precomputed matrix (src/pair_matrix.py) are a lookup.
+    """
+    from src.pair_matrix import DEFAULT_ODDS, load_pair_matrix, missing_features, model_path, form_path
+
+    pairs = load_pair_matrix(league_code)
+    probs = pairs.lookup(home_team, away_team) if pairs is not None else None
+    if probs is not None:
+        print_prediction(home_team, away_team, probs)
+        return True
+
+    model_file, form_file = model_path(league_code), form_path(league_code)
+    if not (os.path.exists(model_file) and os.path.exists(form_file)):
+        return False
+
+    import numpy as np
+    from src.tree_export import load_compact_model
+
+    with open(form_file) as f:
+        teams = json.load(f)['teams']
+
+    for team in (home_team, away_team):
+        if team not in teams:
+            print(f"Team '{team}' not found in database.")
+            return True
+
+    model = load_compact_model(model_file)
+    stats = {k for form in teams.values() for k in form}
+    missing = missing_features(model.feature_names, stats)
+    if missing:
+        print(f"The model needs features the form snapshot does not have: {', '.join(missing)}")
+        print("Please run main.py (without --h2h) to retrain the default model.")
+        return True
+
+    # Home_*/Away_* features come from each team's form, odds from the defaults
+    values = dict(DEFAULT_ODDS)
+    values.update({f'Home_{k}': v for k, v in teams[home_team].items()})
+    values.update({f'Away_{k}': v for k, v in teams[away_team].items()})
+    x = model.vector(values)
+
+    if any(np.isnan(v) for n, v in zip(model.feature_names, x) if n.endswith('Form_Points')):
+        print("Not enough recent matches for one of the teams to compute form.")
+        return True
+
+    probs = model.predict_proba(x)[0]
+    print_prediction(home_team, away_team, probs)
+    return True
 
 def predict_match(home_team, away_team):
     """
     Predicts the outcome of a match between home_team and away_team.
     """
+    if predict_match_fast(home_team, away_team):
+        return
+
+    import pandas as pd
+    import pickle
+    from src.features import calculate_features
+    from src.pair_matrix import DEFAULT_ODDS
+
     # Load model
     try:
         with open('models/xgb_model.pkl', 'rb') as f:
@@ -35,50 +110,64 @@ def predict_match(home_team, away_team):
         'Date': pd.Timestamp.now().strftime('%d/%m/%Y'),
         'HomeTeam': home_team,
         'AwayTeam': away_team,
-        'FTHG': 0, 'FTAG': 0, 'FTR': 'D', 
-        'B365H': 2.0, 'B365D': 3.0, 'B365A': 4.0,
+        'FTHG': 0, 'FTAG': 0, 'FTR': 'D',
+        **DEFAULT_ODDS,
         'Home_xG': 1.5, 'Away_xG': 1.0, # Dummy xG for the dummy match
         'Season': '2324'
     }
-    
+
     # Append to df
     df_with_dummy = pd.concat([df, pd.DataFrame([dummy_row])], ignore_index=True)
-    
+
     # Recalculate features
     df_processed = calculate_features(df_with_dummy)
-    
+
     # Get the last row (our dummy match)
     match_features = df_processed.iloc[[-1]]
-    
+
     # Features required
     features = [
-        'Home_Form_Points', 'Home_Form_GS', 'Home_Form_GC', 
+        'Home_Form_Points', 'Home_Form_GS', 'Home_Form_GC',
         'Away_Form_Points', 'Away_Form_GS', 'Away_Form_GC',
         'Home_Form_xG', 'Home_Form_xGA', 'Home_Form_xG_Diff', 'Home_Form_xGA_Diff',
         'Away_Form_xG', 'Away_Form_xGA', 'Away_Form_xG_Diff', 'Away_Form_xGA_Diff',
         'B365H', 'B365D', 'B365A'
     ]
-    
+
     X = match_features[features]
-    
+
     # Predict
     probs = model.predict_proba(X)[0]
-    prediction = model.predict(X)[0]
-    
-    outcomes = ['Home Win', 'Draw', 'Away Win']
-    
-    print(f"\nPrediction for {home_team} vs {away_team}:")
-    print(f"Predicted Outcome: {outcomes[prediction]}")
-    print(f"Probabilities:")
-    print(f"  Home Win: {probs[0]:.1%}")
-    print(f"  Draw:     {probs[1]:.1%}")
-    print(f"  Away Win: {probs[2]:.1%}")
-    
-    print(f"\n(Note: Odds used for prediction were defaults: 2.0/3.0/4.0. Actual odds may vary model output if included as features.)")
+    print_prediction(home_team, away_team, probs)
+
+def predict_fixtures(path, bankroll=1000, league_code='E0'):
+    """
+    Batch mode: scores every fixture in a CSV (HomeTeam, AwayTeam, B365H,
+    B365D, B365A) at its own prices and sizes the value bets of the round
+    together with fractional Kelly.
+    """
+    import pandas as pd
+    from src.pair_matrix import score_fixtures
+    from src.staking import stake_fixtures
+
+    fixtures = pd.read_csv(path)
+    probs = score_fixtures(fixtures, league_code)
+    staked = stake_fixtures(fixtures, probs, bankroll)
+    for i, outcome in enumerate(['H', 'D', 'A']):
+        staked[f'Prob_{outcome}'] = probs[:, i]
+
+    columns = ['HomeTeam', 'AwayTeam', 'B365H', 'B365D', 'B365A', 'Prob_H', 'Prob_D', 'Prob_A', 'Pick', 'Stake', 'Edge']
+    print(staked[columns].round(3).to_string(index=False))
+    print(f"\nTotal stake: {staked['Stake'].sum():.2f} of {bankroll} bankroll")
+    return staked
 
 if __name__ == "__main__":
-    if len(sys.argv) != 3:
+    if len(sys.argv) >= 3 and sys.argv[1] == '--fixtures':
+        # python predict.py --fixtures upcoming.csv [bankroll]
+        predict_fixtures(sys.argv[2], float(sys.argv[3]) if len(sys.argv) > 3 else 1000)
+    elif len(sys.argv) != 3:
         print("Usage: python predict.py 'Home Team' 'Away Team'")
+        print("       python predict.py --fixtures fixtures.csv [bankroll]")
         print("Example: python predict.py 'Arsenal' 'Liverpool'")
     else:
         predict_match(sys.argv[1], sys.argv[2])
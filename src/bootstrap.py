@@ -0,0 +1,98 @@
+import pandas as pd
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+
+def _round_totals(ledger, rounds=None, y_true=None, y_prob=None):
+    """
+    Collapses per-bet P&L (and per-match log loss) into per-round totals.
+    Resampling then only has to index these small arrays.
+    """
+    ledger_rounds = ledger['Round'].to_numpy() if len(ledger) else np.array([])
+    all_rounds = [ledger_rounds]
+    if rounds is not None:
+        all_rounds.append(np.asarray(rounds))
+    labels, inverse = np.unique(np.concatenate(all_rounds), return_inverse=True)
+    n_rounds = len(labels)
+    bet_round = inverse[:len(ledger_rounds)]
+
+    totals = {
+        'stake': np.bincount(bet_round, weights=ledger['Stake'].to_numpy(dtype=float), minlength=n_rounds),
+        'pnl': np.bincount(bet_round, weights=ledger['PnL'].to_numpy(dtype=float), minlength=n_rounds),
+        'wins': np.bincount(bet_round, weights=ledger['Won'].to_numpy(dtype=float), minlength=n_rounds),
+        'bets': np.bincount(bet_round, minlength=n_rounds).astype(float),
+    }
+
+    if y_true is not None and y_prob is not None:
+        match_round = inverse[len(ledger_rounds):]
+        y_true = np.asarray(y_true, dtype=int)
+        p = np.clip(np.asarray(y_prob)[np.arange(len(y_true)), y_true], 1e-15, 1)
+        totals['ll'] = np.bincount(match_round, weights=-np.log(p), minlength=n_rounds)
+        totals['matches'] = np.bincount(match_round, minlength=n_rounds).astype(float)
+
+    return totals
+
+def _metrics(totals, idx):
+    """Metrics for a (n_resamples, n_rounds) matrix of resampled round indices."""
+    stake = totals['stake'][idx].sum(axis=1)
+    bets = totals['bets'][idx].sum(axis=1)
+    pnl = totals['pnl'][idx]
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        out = {
+            'ROI': pnl.sum(axis=1) / stake,
+            'Hit Rate': totals['wins'][idx].sum(axis=1) / bets,
+        }
+
+    # Drawdown follows the order in which the rounds were drawn
+    equity = np.cumsum(pnl, axis=1)
+    peak = np.maximum(np.maximum.accumulate(equity, axis=1), 0)
+    out['Max Drawdown'] = (peak - equity).max(axis=1)
+
+    if 'll' in totals:
+        out['Log Loss'] = totals['ll'][idx].sum(axis=1) / totals['matches'][idx].sum(axis=1)
+    return out
+
+def _bootstrap_chunk(totals, n_resamples, seed):
+    rng = np.random.default_rng(seed)
+    n_rounds = len(totals['stake'])
+    idx = rng.integers(0, n_rounds, size=(n_resamples, n_rounds))
+    return _metrics(totals, idx)
+
+def bootstrap_ci(ledger, rounds=None, y_true=None, y_prob=None, n_resamples=10000,
+                 alpha=0.05, n_jobs=1, chunk_size=1000, random_state=42):
+    """
+    Block-bootstrap confidence intervals for a backtest.
+    ledger is the per-bet DataFrame from evaluate_betting_strategy(..., return_ledger=True).
+    Whole rounds (matchweeks) are resampled, so bets that settle together stay together.
+    Pass rounds/y_true/y_prob for every test match to also get a Log Loss interval.
+    """
+    totals = _round_totals(ledger, rounds, y_true, y_prob)
+    if len(totals['stake']) == 0:
+        print("No rounds to resample.")
+        return None
+
+    # Split the work into chunks with independent random streams
+    n_chunks = max(1, int(np.ceil(n_resamples / chunk_size)))
+    sizes = [chunk_size] * (n_chunks - 1) + [n_resamples - chunk_size * (n_chunks - 1)]
+    seeds = np.random.SeedSequence(random_state).spawn(n_chunks)
+
+    if n_jobs == 1:
+        chunks = [_bootstrap_chunk(totals, n, s) for n, s in zip(sizes, seeds)]
+    else:
+        with ProcessPoolExecutor(max_workers=None if n_jobs == -1 else n_jobs) as pool:
+            chunks = list(pool.map(_bootstrap_chunk, [totals] * n_chunks, sizes, seeds))
+
+    # Point estimates use every round exactly once, in order
+    point = _metrics(totals, np.arange(len(totals['stake']))[None, :])
+
+    rows = []
+    for name in point:
+        samples = np.concatenate([c[name] for c in chunks])
+        samples = samples[np.isfinite(samples)]
+        lower, upper = np.percentile(samples, [100 * alpha / 2, 100 * (1 - alpha / 2)]) if len(samples) else (np.nan, np.nan)
+        rows.append({'metric': name, 'estimate': point[name][0], 'lower': lower, 'upper': upper})
+
+    ci = pd.DataFrame(rows).set_index('metric')
+    print(f"\n--- Bootstrap {1 - alpha:.0%} CI ({n_resamples} resamples, {len(totals['stake'])} rounds) ---")
+    print(ci)
+    return ci
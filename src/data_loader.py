@@ -1,11 +1,11 @@
 import pandas as pd
-import requests
+from src import http_client
 import io
 import os
 import json
 from bs4 import BeautifulSoup
-import time
 from src.weather_loader import fetch_weather_batch
+from src.publish import publish
 
 def download_data(league='E0', seasons=['2526', '2425', '2324', '2223', '2122']):
     """
@@ -19,7 +19,7 @@ def download_data(league='E0', seasons=['2526', '2425', '2324', '2223', '2122'])
         url = f"{base_url}{season}/{league}.csv"
         print(f"Downloading {url}...")
         try:
-            s = requests.get(url).content
+            s = http_client.get(url, max_age=http_client.RESULTS_MAX_AGE).content
             df = pd.read_csv(io.StringIO(s.decode('utf-8', errors='ignore')))
             df['Season'] = season
             data_frames.append(df)
@@ -54,7 +54,7 @@ def fetch_understat_data(league='EPL', seasons=[2025, 2024, 2023, 2022, 2021]):
         url = f"{base_url}{season}"
         print(f"Fetching Understat data for {season}...")
         try:
-            response = requests.get(url)
+            response = http_client.get(url, max_age=http_client.RESULTS_MAX_AGE)
             soup = BeautifulSoup(response.content, 'html.parser')
             scripts = soup.find_all('script')
             
@@ -77,8 +77,6 @@ def fetch_understat_data(league='EPL', seasons=[2025, 2024, 2023, 2022, 2021]):
             for match in matches:
                 match['Season'] = season
                 all_matches.append(match)
-                
-            time.sleep(1) # Be polite
             
         except Exception as e:
             print(f"Error fetching Understat {season}: {e}")
@@ -106,6 +104,16 @@ def fetch_understat_data(league='EPL', seasons=[2025, 2024, 2023, 2022, 2021]):
     print(f"Saved {len(xg_df)} xG records to data/understat_{league}_history.csv")
     return xg_df
 
+def publish_merged(df, league_code):
+    """
+    Publishes merged data as a new version of the merged_{league_code} snapshot
+    and atomically replaces data/merged_{league_code}.csv (see src/publish.py).
+    """
+    path = f'data/merged_{league_code}.csv'
+    publish(f'merged_{league_code}', {'merged.csv': lambda tmp_path: df.to_csv(tmp_path, index=False)},
+            legacy={'merged.csv': path})
+    print(f"Saved {len(df)} merged matches to {path}")
+
 def merge_data(league_code='E0', understat_league='EPL'):
     """
     Merges football-data.co.uk data with Understat xG data (if available).
@@ -169,7 +177,7 @@ def merge_data(league_code='E0', understat_league='EPL'):
         # merged_df = fetch_weather_batch(merged_df)
         print("Skipping weather fetch (User requested speed)")
         
-        merged_df.to_csv(f'data/merged_{league_code}.csv', index=False)
+        publish_merged(merged_df, league_code)
         return merged_df
     else:
         print("No xG data available. Using basic data.")
@@ -179,7 +187,7 @@ def merge_data(league_code='E0', understat_league='EPL'):
         # df_fd = fetch_weather_batch(df_fd)
         print("Skipping weather fetch (User requested speed)")
         
-        df_fd.to_csv(f'data/merged_{league_code}.csv', index=False)
+        publish_merged(df_fd, league_code)
         return df_fd
 
 if __name__ == "__main__":
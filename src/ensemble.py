@@ -0,0 +1,136 @@
+import pandas as pd
+import numpy as np
+from joblib import Parallel, delayed
+from sklearn.base import clone
+from sklearn.ensemble import HistGradientBoostingClassifier, RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import log_loss
+from sklearn.model_selection import TimeSeriesSplit
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import StandardScaler
+import pickle
+from src.model import select_features
+from src.publish import publish
+
+try:
+    from xgboost import XGBClassifier
+except ImportError:
+    XGBClassifier = None
+
+def default_members():
+    """
+    Model families to stack. XGBoost is included when it is installed.
+    """
+    members = {
+        'hgb': HistGradientBoostingClassifier(
+            max_iter=100, learning_rate=0.1, max_depth=5, random_state=42, scoring='loss'
+        ),
+        'rf': RandomForestClassifier(
+            n_estimators=300, min_samples_leaf=10, random_state=42, n_jobs=1
+        ),
+        'logreg': make_pipeline(StandardScaler(), LogisticRegression(max_iter=1000)),
+    }
+    if XGBClassifier is not None:
+        members['xgb'] = XGBClassifier(
+            n_estimators=200, learning_rate=0.05, max_depth=3, subsample=0.8,
+            objective='multi:softprob', random_state=42, n_jobs=1
+        )
+    return members
+
+class StackedEnsemble:
+    """
+    Member models plus a multinomial logistic regression fitted on their
+    out-of-fold log-probabilities. predict_proba scores a whole batch at once.
+    """
+    def __init__(self, members, meta, features):
+        self.members = members
+        self.meta = meta
+        self.features = features
+        self.classes_ = meta.classes_
+
+    def member_proba(self, X):
+        if isinstance(X, pd.DataFrame):
+            X = X[self.features].to_numpy(dtype=np.float64)
+        return {name: m.predict_proba(X) for name, m in self.members.items()}
+
+    def predict_proba(self, X):
+        return self.meta.predict_proba(_stack(self.member_proba(X).values()))
+
+    def predict(self, X):
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+def _stack(probas):
+    return np.hstack([np.log(np.clip(p, 1e-6, 1)) for p in probas])
+
+def _fit_member(name, estimator, X, y, train_idx, pred_idx):
+    # One (member, fold) job; pred_idx=None means the final fit on all training rows
+    model = clone(estimator)
+    if train_idx is None:
+        model.fit(X, y)
+        return name, None, model
+    model.fit(X[train_idx], y[train_idx])
+    return name, pred_idx, model.predict_proba(X[pred_idx])
+
+def train_ensemble(df, league_code='E0', members=None, n_splits=5, n_jobs=-1):
+    """
+    Trains several model families in parallel on the same features and time split
+    as train_model, then learns a stacking layer on their out-of-fold predictions.
+    Saves the whole ensemble to models/ensemble_{league_code}.pkl.
+    """
+    members = members or default_members()
+    features = select_features(df)
+    target = 'Result'
+
+    df = df.dropna(subset=features + [target])
+    X = df[features].to_numpy(dtype=np.float64)
+    y = df[target].to_numpy(dtype=int)
+
+    # Time-based split (train on older, test on newer)
+    split_index = int(len(df) * 0.8)
+    X_train, X_test = X[:split_index], X[split_index:]
+    y_train, y_test = y[:split_index], y[split_index:]
+
+    print(f"Training ensemble ({', '.join(members)}) on {len(X_train)} samples, testing on {len(X_test)} samples.")
+
+    # Every (member, fold) fit and every final fit is an independent job,
+    # so wall time is roughly that of the slowest member
+    folds = list(TimeSeriesSplit(n_splits=n_splits).split(X_train))
+    jobs = [(name, est, tr, va) for name, est in members.items() for tr, va in folds]
+    jobs += [(name, est, None, None) for name, est in members.items()]
+    results = Parallel(n_jobs=n_jobs)(
+        delayed(_fit_member)(name, est, X_train, y_train, tr, va) for name, est, tr, va in jobs
+    )
+
+    # Out-of-fold predictions (the first fold's rows are never predicted)
+    oof = {name: np.full((len(X_train), 3), np.nan) for name in members}
+    fitted = {}
+    for name, pred_idx, out in results:
+        if pred_idx is None:
+            fitted[name] = out
+        else:
+            oof[name][pred_idx] = out
+    covered = ~np.isnan(oof[next(iter(members))][:, 0])
+
+    meta = LogisticRegression(max_iter=1000, C=1.0)
+    meta.fit(_stack(p[covered] for p in oof.values()), y_train[covered])
+
+    ensemble = StackedEnsemble({name: fitted[name] for name in members}, meta, features)
+
+    # Evaluate
+    print("\nTest Log Loss:")
+    for name, proba in ensemble.member_proba(X_test).items():
+        print(f"  {name:<8} {log_loss(y_test, proba, labels=[0, 1, 2]):.4f}")
+    y_prob = ensemble.predict_proba(X_test)
+    print(f"  {'stacked':<8} {log_loss(y_test, y_prob, labels=[0, 1, 2]):.4f}")
+
+    # Save model
+    def write_pickle(path):
+        with open(path, 'wb') as f:
+            pickle.dump(ensemble, f)
+
+    model_path = f'models/ensemble_{league_code}.pkl'
+    pointer = publish(f'ensemble_{league_code}', {'ensemble.pkl': write_pickle},
+                      legacy={'ensemble.pkl': model_path})
+    print(f"Ensemble saved to {model_path} (version {pointer['version']})")
+
+    return ensemble, df[features].iloc[split_index:], df[target].iloc[split_index:], y_prob
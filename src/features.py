@@ -1,22 +1,15 @@
 import pandas as pd
 import numpy as np
+import json
+from src.publish import publish
 
-def calculate_features(df):
+def team_match_log(df, has_xg=None):
     """
-    Calculates features for the football match data.
-    Handles optional xG stats.
+    One row per team per match (home and away), sorted by team and date.
     """
-    # Sort by date
-    df['Date'] = pd.to_datetime(df['Date'], format='mixed')
-    df = df.sort_values('Date')
+    if has_xg is None:
+        has_xg = 'Home_xG' in df.columns and 'Away_xG' in df.columns
     
-    # Result encoding
-    df['Result'] = df['FTR'].map({'H': 0, 'D': 1, 'A': 2})
-    
-    # Check if xG data is available
-    has_xg = 'Home_xG' in df.columns and 'Away_xG' in df.columns
-    
-    # Create a long dataframe for team stats
     cols = ['Date', 'HomeTeam', 'AwayTeam', 'FTHG', 'FTAG', 'FTR']
     if has_xg:
         cols.extend(['Home_xG', 'Away_xG'])
@@ -37,6 +30,75 @@ def calculate_features(df):
     
     team_stats = pd.concat([home_df, away_df]).sort_values(['Team', 'Date'])
     
+    if has_xg:
+        # xG Performance
+        team_stats['xG_Diff_For'] = team_stats['GoalsScored'] - team_stats['xG_For']
+        team_stats['xG_Diff_Against'] = team_stats['GoalsConceded'] - team_stats['xG_Against']
+    
+    return team_stats
+
+def latest_team_form(df, window=5):
+    """
+    Current form of every team, i.e. the Form_* stats calculate_features would
+    give each team for its next match. Teams with fewer than `window` matches
+    get NaN, as their next match would be dropped by calculate_features.
+    Returns {team: {stat: value}}.
+    """
+    df = df.copy()
+    df['Date'] = pd.to_datetime(df['Date'], format='mixed')
+    team_stats = team_match_log(df)
+    recent = team_stats.groupby('Team').tail(window)
+    grouped = recent.groupby('Team')
+    
+    form = pd.DataFrame({
+        'Form_Points': grouped['Points'].sum(),
+        'Form_GS': grouped['GoalsScored'].mean(),
+        'Form_GC': grouped['GoalsConceded'].mean(),
+    })
+    if 'xG_For' in recent.columns:
+        form['Form_xG_For'] = grouped['xG_For'].mean()
+        form['Form_xG_Against'] = grouped['xG_Against'].mean()
+        form['Form_xG_Diff_For'] = grouped['xG_Diff_For'].mean()
+        form['Form_xG_Diff_Against'] = grouped['xG_Diff_Against'].mean()
+    
+    # Rolling windows need a full window (same as rolling(window) in calculate_features)
+    form.loc[grouped.size() < window] = np.nan
+    return {team: {k: (None if pd.isna(v) else float(v)) for k, v in row.items()}
+            for team, row in form.iterrows()}
+
+def save_team_form(df, league_code='E0', window=5):
+    """
+    Writes the per-team form snapshot used by the fast predict.py path.
+    """
+    path = f'data/team_form_{league_code}.json'
+    snapshot = {'window': window, 'teams': latest_team_form(df, window)}
+    
+    def write_json(tmp_path):
+        with open(tmp_path, 'w') as f:
+            json.dump(snapshot, f)
+    
+    publish(f'team_form_{league_code}', {'team_form.json': write_json}, legacy={'team_form.json': path})
+    print(f"Saved form snapshot for {len(snapshot['teams'])} teams to {path}")
+    return snapshot
+
+def calculate_features(df):
+    """
+    Calculates features for the football match data.
+    Handles optional xG stats.
+    """
+    # Sort by date
+    df['Date'] = pd.to_datetime(df['Date'], format='mixed')
+    df = df.sort_values('Date')
+    
+    # Result encoding
+    df['Result'] = df['FTR'].map({'H': 0, 'D': 1, 'A': 2})
+    
+    # Check if xG data is available
+    has_xg = 'Home_xG' in df.columns and 'Away_xG' in df.columns
+    
+    # Create a long dataframe for team stats
+    team_stats = team_match_log(df, has_xg)
+    
     # Calculate rolling features
     window = 5
     
@@ -50,10 +112,6 @@ def calculate_features(df):
         team_stats['Form_xG_For'] = team_stats.groupby('Team')['xG_For'].transform(lambda x: x.shift(1).rolling(window).mean())
         team_stats['Form_xG_Against'] = team_stats.groupby('Team')['xG_Against'].transform(lambda x: x.shift(1).rolling(window).mean())
         
-        # xG Performance
-        team_stats['xG_Diff_For'] = team_stats['GoalsScored'] - team_stats['xG_For']
-        team_stats['xG_Diff_Against'] = team_stats['GoalsConceded'] - team_stats['xG_Against']
-        
         team_stats['Form_xG_Diff_For'] = team_stats.groupby('Team')['xG_Diff_For'].transform(lambda x: x.shift(1).rolling(window).mean())
         team_stats['Form_xG_Diff_Against'] = team_stats.groupby('Team')['xG_Diff_Against'].transform(lambda x: x.shift(1).rolling(window).mean())
 
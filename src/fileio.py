@@ -0,0 +1,27 @@
+import hashlib
+import json
+import os
+import threading
+
+def file_digest(path):
+    """sha256 of a file's contents (None if it doesn't exist)."""
+    if not os.path.exists(path):
+        return None
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            h.update(block)
+    return h.hexdigest()
+
+def atomic_write(path, data):
+    """
+    Writes bytes or text to a temporary file next to path, then renames it into
+    place (os.replace), so readers see the old or the new contents, never a mix.
+    """
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, 'wb') as f:
+        f.write(data.encode() if isinstance(data, str) else data)
+    os.replace(tmp, path)
+
+def atomic_write_json(path, obj, **kwargs):
+    atomic_write(path, json.dumps(obj, **kwargs))
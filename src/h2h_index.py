@@ -0,0 +1,94 @@
+import pandas as pd
+import numpy as np
+from collections import deque
+
+H2H_FEATURES = [
+    'H2H_Matches', 'H2H_Home_Points', 'H2H_Home_GD',
+    'Home_Venue_Form_Points', 'Home_Venue_Form_GS', 'Home_Venue_Form_GC',
+    'Away_Venue_Form_Points', 'Away_Venue_Form_GS', 'Away_Venue_Form_GC',
+]
+
+class MatchHistoryIndex:
+    """
+    Hash index over completed matches for head-to-head and venue-specific form.
+    - meetings: {(team_a, team_b) sorted pair: last k results between them}
+    - venue: {(team, 'H' or 'A'): last `window` results at that venue}
+    Lookups and updates are O(1) per match, so it can be built in one pass
+    over the history and kept up to date as new results come in.
+    """
+    def __init__(self, k=5, window=5):
+        self.k = k
+        self.window = window
+        self.meetings = {}
+        self.venue = {}
+
+    def add(self, home, away, home_goals, away_goals):
+        """Records a completed match."""
+        pair = (home, away) if home <= away else (away, home)
+        self.meetings.setdefault(pair, deque(maxlen=self.k)).append((home, home_goals, away_goals))
+
+        home_points = 3 if home_goals > away_goals else 1 if home_goals == away_goals else 0
+        away_points = 3 if away_goals > home_goals else 1 if home_goals == away_goals else 0
+        self.venue.setdefault((home, 'H'), deque(maxlen=self.window)).append((home_points, home_goals, away_goals))
+        self.venue.setdefault((away, 'A'), deque(maxlen=self.window)).append((away_points, away_goals, home_goals))
+
+    def last_meetings(self, home, away):
+        """Last k meetings (either venue) as (home_team, home_goals, away_goals), oldest first."""
+        pair = (home, away) if home <= away else (away, home)
+        return list(self.meetings.get(pair, ()))
+
+    def venue_form(self, team, venue):
+        """(points sum, goals scored mean, goals conceded mean) over the last `window` matches at venue."""
+        recent = self.venue.get((team, venue))
+        if recent is None or len(recent) < self.window:
+            return (np.nan, np.nan, np.nan)
+        points, scored, conceded = zip(*recent)
+        return (sum(points), sum(scored) / self.window, sum(conceded) / self.window)
+
+    def features(self, home, away):
+        """Feature values (in H2H_FEATURES order) for an upcoming home v away match."""
+        meetings = self.last_meetings(home, away)
+        points, goal_diff = 0.0, 0.0
+        for venue_home, hg, ag in meetings:
+            # From the point of view of today's home team
+            scored, conceded = (hg, ag) if venue_home == home else (ag, hg)
+            points += 3 if scored > conceded else 1 if scored == conceded else 0
+            goal_diff += scored - conceded
+        n = len(meetings)
+        h2h = [n, points / n if n else 0.0, goal_diff / n if n else 0.0]
+        return h2h + list(self.venue_form(home, 'H')) + list(self.venue_form(away, 'A'))
+
+def add_h2h_features(df, k=5, window=5, index=None, history=None):
+    """
+    Adds H2H_FEATURES columns in a single pass over df in date order.
+    Each match only sees matches before it. Pass an existing index to continue
+    from it (e.g. only new matches); the index is returned for later updates.
+    Like the form features, venue form is NaN until a team has a full window.
+    
+    history: the full match history, when df is a filtered subset of it (e.g.
+    after calculate_features dropped matches without a full form window). The
+    index is built over history so those matches still count as meetings and
+    venue form; df rows are matched on Date, HomeTeam and AwayTeam.
+    """
+    if history is not None:
+        history = history.copy()
+        history['Date'] = pd.to_datetime(history['Date'], format='mixed')
+        history, index = add_h2h_features(history, k, window, index)
+        
+        keys = ['Date', 'HomeTeam', 'AwayTeam']
+        h2h = history[keys + H2H_FEATURES].drop_duplicates(keys)
+        rows = df[keys].assign(Date=pd.to_datetime(df['Date'], format='mixed'))
+        values = rows.merge(h2h, on=keys, how='left')[H2H_FEATURES].set_axis(df.index)
+        return pd.concat([df, values], axis=1), index
+    
+    index = index or MatchHistoryIndex(k, window)
+    ordered = df.sort_values('Date', kind='stable')
+
+    rows = []
+    for home, away, hg, ag in ordered[['HomeTeam', 'AwayTeam', 'FTHG', 'FTAG']].itertuples(index=False):
+        rows.append(index.features(home, away))
+        if not (pd.isna(hg) or pd.isna(ag)):
+            index.add(home, away, hg, ag)
+
+    h2h = pd.DataFrame(rows, columns=H2H_FEATURES, index=ordered.index)
+    return pd.concat([ordered, h2h], axis=1).loc[df.index], index
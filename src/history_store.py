@@ -0,0 +1,226 @@
+import pandas as pd
+import numpy as np
+from src import http_client
+import datetime
+import io
+import os
+import json
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from src.fileio import atomic_write_json
+
+HISTORY_DIR = 'data/history'
+FEATURES_DIR = 'data/features'
+
+# football-data.co.uk league codes (main European divisions)
+LEAGUES = [
+    'E0', 'E1', 'E2', 'E3', 'EC',   # England
+    'SC0', 'SC1', 'SC2', 'SC3',     # Scotland
+    'D1', 'D2',                     # Germany
+    'I1', 'I2',                     # Italy
+    'SP1', 'SP2',                   # Spain
+    'F1', 'F2',                     # France
+    'N1', 'B1', 'P1', 'T1', 'G1',   # Netherlands, Belgium, Portugal, Turkey, Greece
+]
+
+FORM_STATS = ['Points', 'GoalsScored', 'GoalsConceded']
+XG_STATS = ['xG_For', 'xG_Against', 'xG_Diff_For', 'xG_Diff_Against']
+
+# Month a new season's file is expected on football-data (European seasons start in July/August)
+SEASON_START_MONTH = 7
+
+def current_season_year(today=None):
+    """Start year of the season running on `today` (default: now), e.g. 2026-10-19 -> 2026."""
+    today = today or datetime.date.today()
+    return today.year if today.month >= SEASON_START_MONTH else today.year - 1
+
+def season_codes(first_year=1993, last_year=None):
+    """
+    football-data season codes, oldest first: 1993 -> '9394', 2025 -> '2526'.
+    last_year defaults to the season running today.
+    """
+    if last_year is None:
+        last_year = current_season_year()
+    return [f"{y % 100:02d}{(y + 1) % 100:02d}" for y in range(first_year, last_year + 1)]
+
+def season_start_year(season):
+    """'9394' -> 1993, '2324' -> 2023 (football-data has no seasons before 1993)."""
+    yy = int(str(season)[:2])
+    return 1900 + yy if yy >= 90 else 2000 + yy
+
+def parse_dates(dates):
+    """football-data CSVs use dd/mm/yy(yy); shards re-saved by pandas use ISO dates."""
+    dayfirst = dates.astype(str).str.contains('/').any()
+    return pd.to_datetime(dates, format='mixed', dayfirst=dayfirst)
+
+def shard_path(league, season, root=HISTORY_DIR):
+    return os.path.join(root, league, f'{season}.csv')
+
+def load_manifest(root=HISTORY_DIR):
+    path = os.path.join(root, 'manifest.json')
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+def save_manifest(manifest, root=HISTORY_DIR):
+    os.makedirs(root, exist_ok=True)
+    atomic_write_json(os.path.join(root, 'manifest.json'), manifest, indent=2, sort_keys=True)
+
+def write_shard(df, league, season, manifest, root=HISTORY_DIR):
+    """Writes one league/season shard and records it in the manifest (not saved)."""
+    df = df.dropna(subset=['HomeTeam', 'AwayTeam'])
+    df = df.assign(Season=season)
+    path = shard_path(league, season, root)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    df.to_csv(path, index=False)
+
+    dates = parse_dates(df['Date'])
+    manifest.setdefault(league, {})[season] = {
+        'path': os.path.relpath(path, root),
+        'rows': len(df),
+        'first_date': str(dates.min().date()) if len(df) else None,
+        'last_date': str(dates.max().date()) if len(df) else None,
+    }
+
+def download_shards(leagues=LEAGUES, seasons=None, refresh_latest=True, root=HISTORY_DIR):
+    """
+    Downloads football-data.co.uk history into one CSV shard per league and season.
+    Existing shards are kept, except the latest season which is still changing.
+    """
+    seasons = seasons or season_codes()
+    latest = max(seasons, key=season_start_year)
+    base_url = "https://www.football-data.co.uk/mmz4281/"
+    manifest = load_manifest(root)
+
+    for league in leagues:
+        for season in seasons:
+            if season in manifest.get(league, {}) and not (refresh_latest and season == latest):
+                continue
+            url = f"{base_url}{season}/{league}.csv"
+            print(f"Downloading {url}...")
+            try:
+                # Finished seasons never change; the latest one is revalidated
+                max_age = http_client.RESULTS_MAX_AGE if season == latest else float('inf')
+                s = http_client.get(url, max_age=max_age).content
+                df = pd.read_csv(io.StringIO(s.decode('utf-8', errors='ignore')))
+                write_shard(df, league, season, manifest, root)
+            except Exception as e:
+                print(f"Error downloading {season} for {league}: {e}")
+        # Save after each league so an interrupted download keeps its progress
+        save_manifest(manifest, root)
+
+    return manifest
+
+def import_csv(path, league, season_col='Season', root=HISTORY_DIR):
+    """Splits an existing history CSV (e.g. data/merged_E0.csv) into season shards."""
+    df = pd.read_csv(path)
+    manifest = load_manifest(root)
+    for season, shard in df.groupby(df[season_col].astype(str).str.zfill(4)):
+        write_shard(shard, league, season, manifest, root)
+    save_manifest(manifest, root)
+    return manifest
+
+def iter_shards(league, root=HISTORY_DIR):
+    """Yields (season, DataFrame) for a league, oldest first, one shard in memory at a time."""
+    seasons = load_manifest(root).get(league, {})
+    for season in sorted(seasons, key=season_start_year):
+        yield season, pd.read_csv(os.path.join(root, seasons[season]['path']), low_memory=False)
+
+class TeamFormState:
+    """
+    Each team's last `window` results, carried from one shard to the next.
+    Gives the same Form_* values as calculate_features without holding the history.
+    """
+    def __init__(self, window=5, has_xg=False):
+        self.window = window
+        self.stats = FORM_STATS + (XG_STATS if has_xg else [])
+        self.recent = {}
+
+    def form(self, team):
+        """Form_* stats before the team's next match (NaN until a full window exists)."""
+        recent = self.recent.get(team)
+        if recent is None or len(recent) < self.window:
+            return [np.nan] * len(self.stats)
+        values = np.array(recent)
+        out = values.mean(axis=0)
+        out[0] = values[:, 0].sum()  # Form_Points is a rolling sum, the rest are means
+        return list(out)
+
+    def add(self, team, values):
+        self.recent.setdefault(team, deque(maxlen=self.window)).append(values)
+
+def shard_features(shard, state):
+    """
+    Form features for one shard using (and advancing) the carried team state.
+    Rows are returned in date order; like calculate_features, matches where a
+    team has no full form window yet are dropped.
+    """
+    has_xg = 'Home_xG' in shard.columns and 'Away_xG' in shard.columns
+    shard = shard.dropna(subset=['HomeTeam', 'AwayTeam', 'FTR']).copy()
+    shard['Date'] = parse_dates(shard['Date'])
+    shard = shard.sort_values('Date', kind='stable')
+    shard['Result'] = shard['FTR'].map({'H': 0, 'D': 1, 'A': 2})
+
+    names = ['Form_Points', 'Form_GS', 'Form_GC']
+    if has_xg:
+        names += ['Form_xG_For', 'Form_xG_Against', 'Form_xG_Diff_For', 'Form_xG_Diff_Against']
+
+    cols = ['HomeTeam', 'AwayTeam', 'FTHG', 'FTAG', 'FTR'] + (['Home_xG', 'Away_xG'] if has_xg else [])
+    home_rows, away_rows = [], []
+    for row in shard[cols].itertuples(index=False):
+        home, away, hg, ag, ftr = row[:5]
+        home_rows.append(state.form(home))
+        away_rows.append(state.form(away))
+
+        home_vals = [{'H': 3, 'D': 1, 'A': 0}[ftr], hg, ag]
+        away_vals = [{'A': 3, 'D': 1, 'H': 0}[ftr], ag, hg]
+        if has_xg:
+            hxg, axg = row[5], row[6]
+            home_vals += [hxg, axg, hg - hxg, ag - axg]
+            away_vals += [axg, hxg, ag - axg, hg - hxg]
+        state.add(home, home_vals)
+        state.add(away, away_vals)
+
+    n = len(names)
+    home_form = pd.DataFrame(np.array(home_rows, dtype=float).reshape(-1, n), columns=[f'Home_{c}' for c in names], index=shard.index)
+    away_form = pd.DataFrame(np.array(away_rows, dtype=float).reshape(-1, n), columns=[f'Away_{c}' for c in names], index=shard.index)
+    out = pd.concat([shard, home_form, away_form], axis=1)
+    return out.dropna(subset=['Home_Form_Points', 'Away_Form_Points'])
+
+def stream_features(league, window=5, root=HISTORY_DIR):
+    """Yields (season, feature DataFrame) shard by shard, carrying team form across seasons."""
+    state = None
+    for season, shard in iter_shards(league, root):
+        has_xg = 'Home_xG' in shard.columns and 'Away_xG' in shard.columns
+        if state is None or (len(state.stats) > len(FORM_STATS)) != has_xg:
+            # xG coverage changed (e.g. older seasons): restart the carried state with the new layout
+            state = TeamFormState(window, has_xg)
+        yield season, shard_features(shard, state)
+
+def build_league_features(league, window=5, root=HISTORY_DIR, out_root=FEATURES_DIR):
+    """Writes data/features/{league}/{season}.csv for every shard of one league."""
+    rows = 0
+    for season, features in stream_features(league, window, root):
+        path = shard_path(league, season, out_root)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        features.to_csv(path, index=False)
+        rows += len(features)
+    print(f"{league}: {rows} feature rows")
+    return league, rows
+
+def build_features(leagues=None, window=5, n_jobs=None, root=HISTORY_DIR, out_root=FEATURES_DIR):
+    """
+    Streams feature engineering over every league in the store. Leagues are
+    independent, so each one runs in its own worker process.
+    """
+    leagues = leagues or sorted(load_manifest(root))
+    if n_jobs == 1:
+        return dict(build_league_features(l, window, root, out_root) for l in leagues)
+    with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+        futures = [pool.submit(build_league_features, l, window, root, out_root) for l in leagues]
+        return dict(f.result() for f in futures)
+
+if __name__ == "__main__":
+    download_shards()
+    build_features()
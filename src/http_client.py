@@ -0,0 +1,196 @@
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from urllib.parse import urlencode, urlparse
+import hashlib
+import json
+import os
+import threading
+import time
+from src.fileio import atomic_write
+
+HTTP_CACHE_DIR = 'data/http_cache'
+
+# How long downloaded results (football-data, Understat) are reused before revalidating
+RESULTS_MAX_AGE = 6 * 60 * 60
+
+# Minimum seconds between two requests to the same host
+RATE_LIMITS = {
+    'www.football-data.co.uk': 0.2,
+    'understat.com': 1.0,  # Be polite
+    'archive-api.open-meteo.com': 0.1,
+    'api.open-meteo.com': 0.1,
+}
+
+class OfflineError(Exception):
+    """Raised in offline mode when no recorded response exists for a request."""
+
+class CachedResponse:
+    """
+    The subset of requests.Response the loaders use, for live and replayed responses alike.
+    """
+    def __init__(self, status_code, content, headers=None, url=None, from_cache=False):
+        self.status_code = status_code
+        self.content = content
+        self.headers = dict(headers or {})
+        self.url = url
+        self.from_cache = from_cache
+
+    @property
+    def ok(self):
+        return self.status_code < 400
+
+    @property
+    def text(self):
+        return self.content.decode('utf-8', errors='ignore')
+
+    def json(self):
+        return json.loads(self.content)
+
+class HttpClient:
+    """
+    Shared HTTP layer for all loaders: pooled session, retries with backoff,
+    per-host rate limits and an on-disk response cache.
+
+    Cached responses are served without a request while younger than max_age,
+    and revalidated with ETag / Last-Modified afterwards. In offline mode only
+    recorded responses are served, so the pipeline can run with no network.
+    """
+    def __init__(self, cache_dir=HTTP_CACHE_DIR, offline=None, retries=3, backoff=0.5,
+                 timeout=15, rate_limits=None):
+        self.cache_dir = cache_dir
+        if offline is None:
+            offline = os.environ.get('FOOTBALL_HTTP_OFFLINE', '') not in ('', '0')
+        self.offline = offline
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.rate_limits = RATE_LIMITS if rate_limits is None else rate_limits
+        self.network_calls = 0
+
+        self._sessions = {}
+        self._host_locks = {}
+        self._last_request = {}
+        self._lock = threading.Lock()
+
+    def session(self, retries=None):
+        """Pooled session whose requests are retried `retries` times (default: self.retries)."""
+        retries = self.retries if retries is None else retries
+        with self._lock:
+            session = self._sessions.get(retries)
+            if session is None:
+                # Retries also cover connect/read timeouts, so each one can cost a full timeout
+                retry = Retry(total=retries, backoff_factor=self.backoff,
+                              status_forcelist=[429, 500, 502, 503, 504], allowed_methods=['GET']) if retries else 0
+                adapter = HTTPAdapter(pool_connections=8, pool_maxsize=16, max_retries=retry)
+                session = requests.Session()
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                self._sessions[retries] = session
+            return session
+
+    def get(self, url, params=None, max_age=None, cache=True, timeout=None, retries=None):
+        """
+        GET with caching. max_age (seconds) is how long a cached response is used
+        without contacting the server; None always revalidates, float('inf') never does.
+        retries: override the client's retry count, e.g. 0 on interactive paths
+        where a slow failure is worse than falling back.
+        """
+        key = self._cache_key(url, params)
+        cached = self._load(key) if cache or self.offline else None
+
+        if cached is not None:
+            meta, response = cached
+            if self.offline or (max_age is not None and time.time() - meta['fetched_at'] < max_age):
+                return response
+        elif self.offline:
+            raise OfflineError(f"No recorded response for {url} {params or ''}")
+
+        headers = {}
+        if cached is not None:
+            if meta.get('etag'):
+                headers['If-None-Match'] = meta['etag']
+            if meta.get('last_modified'):
+                headers['If-Modified-Since'] = meta['last_modified']
+
+        self._throttle(urlparse(url).netloc)
+        r = self.session(retries).get(url, params=params, headers=headers, timeout=timeout or self.timeout)
+        self.network_calls += 1
+
+        if r.status_code == 304 and cached is not None:
+            meta['fetched_at'] = time.time()
+            self._write_meta(key, meta)
+            return response
+
+        response = CachedResponse(r.status_code, r.content, r.headers, r.url)
+        if cache and r.ok:
+            self._save(key, response)
+        return response
+
+    def _throttle(self, host):
+        interval = self.rate_limits.get(host, 0)
+        if not interval:
+            return
+        with self._lock:
+            lock = self._host_locks.setdefault(host, threading.Lock())
+        with lock:
+            wait = self._last_request.get(host, 0) + interval - time.time()
+            if wait > 0:
+                time.sleep(wait)
+            self._last_request[host] = time.time()
+
+    # --- on-disk cache: <key>.json (metadata) + <key>.body ---
+
+    def _cache_key(self, url, params):
+        query = urlencode(sorted((params or {}).items()))
+        return hashlib.sha256(f"{url}?{query}".encode()).hexdigest()
+
+    def _paths(self, key):
+        base = os.path.join(self.cache_dir, key[:2], key)
+        return base + '.json', base + '.body'
+
+    def _load(self, key):
+        meta_path, body_path = self._paths(key)
+        try:
+            with open(meta_path) as f:
+                meta = json.load(f)
+            with open(body_path, 'rb') as f:
+                body = f.read()
+        except (OSError, ValueError):
+            return None
+        return meta, CachedResponse(meta['status_code'], body, meta.get('headers'), meta.get('url'), from_cache=True)
+
+    def _save(self, key, response):
+        meta_path, body_path = self._paths(key)
+        os.makedirs(os.path.dirname(meta_path), exist_ok=True)
+        atomic_write(body_path, response.content)
+        self._write_meta(key, {
+            'url': response.url,
+            'status_code': response.status_code,
+            'headers': {k: v for k, v in response.headers.items() if k.lower() in ('content-type', 'etag', 'last-modified')},
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'fetched_at': time.time(),
+        })
+
+    def _write_meta(self, key, meta):
+        meta_path, _ = self._paths(key)
+        atomic_write(meta_path, json.dumps(meta))
+
+_client = None
+_client_lock = threading.Lock()
+
+def get_client():
+    """The process-wide client shared by all loaders."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = HttpClient()
+        return _client
+
+def set_offline(offline=True):
+    """Switches the shared client to (or from) replaying recorded responses only."""
+    get_client().offline = offline
+
+def get(url, params=None, **kwargs):
+    return get_client().get(url, params=params, **kwargs)
@@ -0,0 +1,100 @@
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+def run_training_job(league_code, understat_league, progress):
+    """
+    Full retrain for one league (merge -> features -> train -> all-pairs
+    predictions), run in a worker process.
+    The old model file stays in place until train_model saves the new one.
+    """
+    def report(step):
+        status = dict(progress.get(league_code, {}))
+        status['step'] = step
+        progress[league_code] = status
+
+    import pandas as pd
+    from src.data_loader import merge_data
+    from src.features import calculate_features, save_team_form
+    from src.model import train_model
+    from src.pair_matrix import materialize
+
+    report("Step 1/4: Downloading & Merging Data...")
+    merge_data(league_code, understat_league)
+    df = pd.read_csv(f'data/merged_{league_code}.csv')
+
+    report("Step 2/4: Engineering Features...")
+    df_processed = calculate_features(df.copy())
+    save_team_form(df, league_code)
+
+    report("Step 3/4: Training Model...")
+    train_model(df_processed, league_code)
+
+    report("Step 4/4: Precomputing Predictions...")
+    materialize(league_code)
+
+    report("Done")
+    return league_code
+
+class TrainingJobs:
+    """
+    Background retraining queue shared by every app session.
+    At most one job per league is queued or running; submitting the same
+    league again returns the job that is already in flight.
+    """
+    def __init__(self, max_workers=1):
+        # spawn: never fork the (multi-threaded) Streamlit server process
+        context = multiprocessing.get_context('spawn')
+        self._executor = ProcessPoolExecutor(max_workers=max_workers, mp_context=context)
+        self._manager = context.Manager()
+        self._progress = self._manager.dict()
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, league_code, understat_league=None):
+        """Queues a retrain for league_code unless one is already pending. Returns the future."""
+        with self._lock:
+            job = self._jobs.get(league_code)
+            if job is not None and not job.done():
+                return job
+
+            self._progress[league_code] = {'step': "Queued", 'started': time.time()}
+            job = self._executor.submit(run_training_job, league_code, understat_league, self._progress)
+            job.add_done_callback(lambda f, code=league_code: self._finish(code, f))
+            self._jobs[league_code] = job
+            return job
+
+    def _finish(self, league_code, future):
+        status = dict(self._progress.get(league_code, {}))
+        status['finished'] = time.time()
+        error = future.exception()
+        if error is not None:
+            status['error'] = str(error)
+        self._progress[league_code] = status
+
+    def status(self, league_code):
+        """
+        Returns {'state': 'idle'|'running'|'done'|'failed', 'step': ..., 'error': ...}.
+        """
+        with self._lock:
+            job = self._jobs.get(league_code)
+        if job is None:
+            return {'state': 'idle'}
+
+        status = dict(self._progress.get(league_code, {}))
+        if not job.done():
+            status['state'] = 'running'
+        elif job.exception() is not None:
+            status['state'] = 'failed'
+            status.setdefault('error', str(job.exception()))
+        else:
+            status['state'] = 'done'
+        return status
+
+    def is_running(self, league_code):
+        return self.status(league_code)['state'] == 'running'
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self._manager.shutdown()
@@ -0,0 +1,145 @@
+import pandas as pd
+import numpy as np
+from sklearn.metrics import accuracy_score, log_loss
+from sklearn.ensemble import HistGradientBoostingClassifier
+import sys
+from src.model import select_features, save_model, fit_state
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Rough bytes per cell / row while HistGradientBoostingClassifier fits:
+# it converts X to float64 (8) and bins it to uint8 (1), and keeps
+# gradients, hessians (float32) and raw predictions (float64) per class.
+FIT_BYTES_PER_CELL = 9
+FIT_BYTES_PER_ROW_PER_CLASS = 16
+N_CLASSES = 3
+
+def peak_rss():
+    """Peak resident set size of this process in bytes (None where unavailable)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+def feature_matrix(df, features, target='Result', chunk_size=100000):
+    """
+    Builds one C-contiguous float32 matrix of `features` plus an int8 target,
+    keeping only rows with no missing feature or target (like dropna).
+    Columns are cast straight into the preallocated matrix and incomplete rows
+    are compacted in place chunk by chunk, so no full-size copy of the data
+    exists besides the matrix itself.
+    Returns (X, y, index) where index holds the df labels of the kept rows.
+    """
+    n = len(df)
+    X = np.empty((n, len(features)), dtype=np.float32)
+    for j, col in enumerate(features):
+        np.copyto(X[:, j], df[col].to_numpy(), casting='unsafe')
+
+    result = df[target].to_numpy()
+    y = np.full(n, -1, dtype=np.int8)
+    has_target = ~pd.isna(result)
+    y[has_target] = result[has_target]
+    positions = np.arange(n)
+
+    write = 0
+    for start in range(0, n, chunk_size):
+        end = min(start + chunk_size, n)
+        keep = np.flatnonzero(~np.isnan(X[start:end]).any(axis=1) & (y[start:end] >= 0)) + start
+        # Rows only ever move towards the front, so nothing unread is overwritten
+        k = len(keep)
+        X[write:write + k] = X[keep]
+        y[write:write + k] = y[keep]
+        positions[write:write + k] = keep
+        write += k
+
+    X.resize((write, len(features)), refcheck=False)
+    y.resize(write, refcheck=False)
+    return X, y, df.index[positions[:write]]
+
+def estimate_training_bytes(n_rows, n_train, n_features, eval_chunk):
+    """Estimated memory for the float32 matrix, fitting on n_train rows and chunked evaluation."""
+    matrix = n_rows * (n_features * 4 + 1 + 8)
+    fit = n_train * (n_features * FIT_BYTES_PER_CELL + N_CLASSES * FIT_BYTES_PER_ROW_PER_CLASS)
+    evaluate = min(eval_chunk, n_rows) * (n_features * 8 + N_CLASSES * 8)
+    return matrix + fit + evaluate
+
+def time_stratified_sample(n_rows, size, n_blocks=50, random_state=42):
+    """
+    Sorted positions of `size` rows out of n_rows time-ordered rows, drawn evenly
+    from n_blocks consecutive blocks so every period keeps its share of matches.
+    """
+    rng = np.random.default_rng(random_state)
+    blocks = np.array_split(np.arange(n_rows), min(n_blocks, n_rows))
+    fraction = size / n_rows
+    picks = [rng.choice(block, int(round(len(block) * fraction)), replace=False) for block in blocks]
+    return np.sort(np.concatenate(picks))
+
+def train_model_lean(df, league_code='E0', memory_budget=None, eval_chunk=50000, random_state=42):
+    """
+    Memory-lean variant of train_model for very large (multi-league, multi-season)
+    feature tables: same features, split and model, but trained from a single
+    float32 matrix with train/test as views into it.
+    memory_budget (bytes): if fitting on every training row would not fit, the
+    training rows are subsampled evenly across time to fit. The test period is
+    always scored in full, eval_chunk rows at a time.
+    Skips permutation importance. Returns the same (model, X_test, y_test, y_prob).
+    """
+    features = select_features(df)
+    print(f"Training memory-lean model for {league_code} ({len(features)} features)")
+
+    X, y, index = feature_matrix(df, features)
+    n_rows = len(y)
+    split_index = int(n_rows * 0.8)
+    X_train, X_test = X[:split_index], X[split_index:]
+    y_train, y_test = y[:split_index], y[split_index:]
+
+    n_train = split_index
+    if memory_budget is not None:
+        needed = estimate_training_bytes(n_rows, n_train, len(features), eval_chunk)
+        if needed > memory_budget:
+            fixed = estimate_training_bytes(n_rows, 0, len(features), eval_chunk)
+            if fixed >= memory_budget:
+                raise MemoryError(f"The feature matrix alone needs ~{fixed / 2**20:.0f} MB, "
+                                  f"over the {memory_budget / 2**20:.0f} MB budget")
+            per_row = (needed - fixed) / n_train
+            n_train = int((memory_budget - fixed) / per_row)
+            rows = time_stratified_sample(split_index, n_train, random_state=random_state)
+            X_train, y_train = X_train[rows], y_train[rows]
+            print(f"Memory budget {memory_budget / 2**20:.0f} MB: training on a time-stratified "
+                  f"sample of {len(rows)} / {split_index} matches.")
+
+    print(f"Training on {len(y_train)} samples, testing on {len(y_test)} samples.")
+
+    model = HistGradientBoostingClassifier(
+        max_iter=100,
+        learning_rate=0.1,
+        max_depth=5,
+        random_state=42,
+        scoring='loss'
+    )
+    # DataFrames over the float32 views (no copy) so the model keeps feature names
+    model.fit(pd.DataFrame(X_train, columns=features, copy=False), y_train)
+    X_test = pd.DataFrame(X_test, columns=features, index=index[split_index:], copy=False)
+    y_test = pd.Series(y_test, index=X_test.index, name='Result')
+
+    # Score the test period in chunks to bound the float64 copies sklearn makes
+    y_prob = np.empty((len(X_test), N_CLASSES))
+    for start in range(0, len(X_test), eval_chunk):
+        y_prob[start:start + eval_chunk] = model.predict_proba(X_test.iloc[start:start + eval_chunk])
+
+    acc = accuracy_score(y_test, model.classes_[y_prob.argmax(axis=1)])
+    loss = log_loss(y_test, y_prob, labels=model.classes_)
+    print(f"Accuracy: {acc:.4f}")
+    print(f"Log Loss: {loss:.4f}")
+
+    peak = peak_rss()
+    if peak is not None:
+        print(f"Peak RSS: {peak / 2**20:.0f} MB")
+
+    save_model(model, league_code, X_check=X_test.iloc[:1000], state=fit_state(df, X_test.index, y_test, y_prob))
+
+    return model, X_test, y_test, y_prob
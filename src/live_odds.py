@@ -0,0 +1,235 @@
+import json
+import math
+import os
+import socket
+import sys
+import time
+from src.staking import kelly_single, ODDS_COLS
+
+OUTCOME_CODES = ('H', 'D', 'A')
+
+class LiveValueScanner:
+    """
+    Keeps model probabilities for upcoming fixtures cached and re-prices them
+    as odds move. Each update only touches the fixture it belongs to.
+
+    Probabilities are computed once per fixture (at the odds known when it is
+    added). Since the model also takes the odds as inputs, rescore=True
+    re-evaluates the fixture with the compact model on every price change
+    instead, at the cost of one single-row tree walk per update.
+    """
+    def __init__(self, model=None, teams=None, bankroll=1000, rescore=False,
+                 on_alert=None, **kelly_kwargs):
+        self.model = model          # CompactModel, needed for add_fixture_from_form/rescore
+        self.teams = teams or {}    # {team: form stats} from data/team_form_{league}.json
+        self.bankroll = bankroll
+        self.rescore = rescore
+        self.on_alert = on_alert or print_alert
+        self.kelly_kwargs = kelly_kwargs
+        self.fixtures = {}
+        self.updates = 0
+
+    def add_fixture(self, fixture_id, probs, odds=None, features=None, home=None, away=None):
+        """Registers a fixture with its model probabilities (H/D/A)."""
+        self.fixtures[fixture_id] = {
+            'home': home, 'away': away,
+            'probs': [float(p) for p in probs],
+            'odds': [None, None, None] if odds is None else list(odds),
+            'features': features,
+            'pick': -1, 'stake': 0.0, 'edge': 0.0,
+        }
+        if odds is not None:
+            self._reprice(fixture_id)
+
+    def add_fixture_from_form(self, fixture_id, home, away, odds):
+        """Scores a fixture from the team form snapshot and registers it."""
+        if self.model is None or home not in self.teams or away not in self.teams:
+            return False
+
+        values = dict(zip(ODDS_COLS, odds))
+        values.update({f'Home_{k}': v for k, v in self.teams[home].items()})
+        values.update({f'Away_{k}': v for k, v in self.teams[away].items()})
+        features = self.model.vector(values)
+        # Like predict.py: no prediction until both teams have a full form window
+        if any(math.isnan(v) for n, v in zip(self.model.feature_names, features) if n.endswith('Form_Points')):
+            return False
+        probs = self.model.predict_proba(features)[0]
+        self.add_fixture(fixture_id, probs, odds, features=features, home=home, away=away)
+        return True
+
+    def update(self, message):
+        """
+        Applies one price message, e.g.
+        {"fixture": "E0-ARS-LIV", "home": "Arsenal", "away": "Liverpool", "B365H": 2.1}
+        Missing prices keep their previous value. Returns the alert dict, if any.
+        Raises ValueError for a message that is not a dict or has a non-numeric
+        price, before anything is changed.
+        """
+        self.updates += 1
+        if not isinstance(message, dict):
+            raise ValueError(f"price message must be a JSON object, got {message!r}")
+        prices = {}
+        for key in ODDS_COLS:
+            if message.get(key) is not None:
+                try:
+                    prices[key] = float(message[key])
+                except (TypeError, ValueError):
+                    raise ValueError(f"non-numeric {key} price {message[key]!r}") from None
+
+        fixture_id = message.get('fixture') or f"{message.get('home')} v {message.get('away')}"
+        fixture = self.fixtures.get(fixture_id)
+
+        if fixture is None:
+            # Unknown fixture: score it on the fly if we have the full price and team form
+            if not all(prices.get(k) for k in ODDS_COLS):
+                return None
+            odds = [prices[k] for k in ODDS_COLS]
+            if not self.add_fixture_from_form(fixture_id, message.get('home'), message.get('away'), odds):
+                return None
+            return self._alert(fixture_id, previous_pick=-1)
+
+        odds = fixture['odds']
+        changed = False
+        for i, key in enumerate(ODDS_COLS):
+            price = prices.get(key)
+            if price is not None and price != odds[i]:
+                odds[i] = price
+                changed = True
+        if not changed:
+            return None
+
+        if self.rescore and fixture['features'] is not None and None not in odds:
+            for i, key in enumerate(ODDS_COLS):
+                idx = self._odds_index(key)
+                if idx is not None:
+                    fixture['features'][idx] = odds[i]
+            fixture['probs'] = [float(p) for p in self.model.predict_proba(fixture['features'])[0]]
+
+        previous_pick = fixture['pick']
+        self._reprice(fixture_id)
+        return self._alert(fixture_id, previous_pick)
+
+    def _odds_index(self, key):
+        try:
+            return self.model.feature_names.index(key)
+        except ValueError:
+            return None
+
+    def _reprice(self, fixture_id):
+        fixture = self.fixtures[fixture_id]
+        stake, pick, edge = kelly_single(fixture['probs'], fixture['odds'], self.bankroll, **self.kelly_kwargs)
+        fixture['stake'], fixture['pick'], fixture['edge'] = stake, pick, edge
+
+    def _alert(self, fixture_id, previous_pick):
+        # Alert when a fixture becomes value, switches pick, or stops being value
+        fixture = self.fixtures[fixture_id]
+        if fixture['pick'] == previous_pick:
+            return None
+
+        pick = fixture['pick']
+        alert = {
+            'fixture': fixture_id,
+            'home': fixture['home'],
+            'away': fixture['away'],
+            'pick': OUTCOME_CODES[pick] if pick >= 0 else None,
+            'odds': fixture['odds'][pick] if pick >= 0 else None,
+            'prob': fixture['probs'][pick] if pick >= 0 else None,
+            'edge': fixture['edge'],
+            'stake': fixture['stake'],
+        }
+        self.on_alert(alert)
+        return alert
+
+    def run(self, feed):
+        """
+        Consumes a feed (any iterable of price dicts) until it ends. Malformed
+        messages are logged and skipped, so one bad update cannot stop the scanner.
+        """
+        for message in feed:
+            try:
+                self.update(message)
+            except ValueError as e:
+                print(f"Skipping price message: {e}", file=sys.stderr)
+
+def print_alert(alert):
+    if alert['pick'] is None:
+        print(f"[value gone] {alert['fixture']}")
+    else:
+        print(f"[value] {alert['fixture']}: back {alert['pick']} @ {alert['odds']:.2f} "
+              f"(p={alert['prob']:.1%}, edge={alert['edge']:.1%}, stake={alert['stake']:.2f})")
+
+def _parse_line(line):
+    # One JSON object per line; blank and malformed lines are skipped (and logged)
+    if not line.strip():
+        return None
+    try:
+        return json.loads(line)
+    except json.JSONDecodeError as e:
+        print(f"Skipping malformed feed line {line.strip()[:80]!r}: {e}", file=sys.stderr)
+        return None
+
+def tail_jsonl(path, poll_interval=0.05, from_start=True, follow=True):
+    """
+    Yields price dicts from a JSON-lines file, following it as it grows (like tail -f).
+    With follow=False stops at the end of the file.
+    """
+    with open(path) as f:
+        if not from_start:
+            f.seek(0, os.SEEK_END)
+        buffer = ''
+        while True:
+            line = f.readline()
+            if not line:
+                if not follow:
+                    break
+                time.sleep(poll_interval)
+                continue
+            buffer += line
+            if not buffer.endswith('\n'):
+                continue  # partially written line, wait for the rest
+            message = _parse_line(buffer)
+            if message is not None:
+                yield message
+            buffer = ''
+
+def socket_feed(host='127.0.0.1', port=9999):
+    """Yields price dicts from a TCP server sending one JSON object per line."""
+    with socket.create_connection((host, port)) as conn:
+        with conn.makefile('r') as stream:
+            for line in stream:
+                message = _parse_line(line)
+                if message is not None:
+                    yield message
+
+def load_scanner(league_code='E0', **kwargs):
+    """Scanner backed by the compact model and team form snapshot written by main.py."""
+    from src.tree_export import load_compact_model
+    from src.pair_matrix import missing_features, model_path, form_path
+
+    model = load_compact_model(model_path(league_code))
+    with open(form_path(league_code)) as f:
+        teams = json.load(f)['teams']
+
+    missing = missing_features(model.feature_names, {k for form in teams.values() for k in form})
+    if missing:
+        raise ValueError(f"Model features not available from team form: {', '.join(missing)}")
+    return LiveValueScanner(model=model, teams=teams, **kwargs)
+
+if __name__ == "__main__":
+    # python -m src.live_odds E0 odds_feed.jsonl   or   python -m src.live_odds E0 127.0.0.1:9999
+    if len(sys.argv) != 3:
+        print("Usage: python -m src.live_odds <league_code> <feed.jsonl | host:port>")
+        sys.exit(1)
+
+    scanner = load_scanner(sys.argv[1], rescore=True)
+    source = sys.argv[2]
+    if os.path.exists(source):
+        feed = tail_jsonl(source)
+    else:
+        host, port = source.rsplit(':', 1)
+        feed = socket_feed(host, int(port))
+
+    try:
+        scanner.run(feed)
+    except KeyboardInterrupt:
+        print(f"\nProcessed {scanner.updates} price updates.")
@@ -5,7 +5,42 @@ from sklearn.metrics import accuracy_score, classification_report, log_loss
 from sklearn.ensemble import HistGradientBoostingClassifier
 from sklearn.inspection import permutation_importance
 import pickle
+import json
 import os
+from src.staking import kelly_stakes, ODDS_COLS
+from src.tree_export import export_model
+from src.h2h_index import H2H_FEATURES
+from src.publish import publish, read_pointer, SNAPSHOT_DIR
+
+BASE_FEATURES = [
+    'Home_Form_Points', 'Home_Form_GS', 'Home_Form_GC', 
+    'Away_Form_Points', 'Away_Form_GS', 'Away_Form_GC',
+    'B365H', 'B365D', 'B365A'
+]
+
+XG_FEATURES = [
+    'Home_Form_xG', 'Home_Form_xGA', 'Home_Form_xG_Diff', 'Home_Form_xGA_Diff',
+    'Away_Form_xG', 'Away_Form_xGA', 'Away_Form_xG_Diff', 'Away_Form_xGA_Diff'
+]
+
+WEATHER_FEATURES = [
+    'Home_Rain', 'Home_Temperature', 'Home_WindSpeed',
+    'Away_Rain', 'Away_Temperature', 'Away_WindSpeed'
+]
+
+def select_features(df):
+    """
+    Feature columns to train on, based on what's available (xG, weather,
+    head-to-head from add_h2h_features).
+    """
+    features = BASE_FEATURES.copy()
+    if 'Home_Form_xG' in df.columns:
+        features.extend(XG_FEATURES)
+    if 'Home_Rain' in df.columns:
+        features.extend(WEATHER_FEATURES)
+    if 'H2H_Matches' in df.columns:
+        features.extend(H2H_FEATURES)
+    return features
 
 def train_model(df, league_code='E0'):
     """
@@ -13,32 +48,13 @@ def train_model(df, league_code='E0'):
     Adapts features based on availability (xG vs no xG).
     """
     # Define features based on what's available
-    base_features = [
-        'Home_Form_Points', 'Home_Form_GS', 'Home_Form_GC', 
-        'Away_Form_Points', 'Away_Form_GS', 'Away_Form_GC',
-        'B365H', 'B365D', 'B365A'
-    ]
-    
-    xg_features = [
-        'Home_Form_xG', 'Home_Form_xGA', 'Home_Form_xG_Diff', 'Home_Form_xGA_Diff',
-        'Away_Form_xG', 'Away_Form_xGA', 'Away_Form_xG_Diff', 'Away_Form_xGA_Diff'
-    ]
-    
-    weather_features = [
-        'Home_Rain', 'Home_Temperature', 'Home_WindSpeed',
-        'Away_Rain', 'Away_Temperature', 'Away_WindSpeed'
-    ]
-    
-    # Check if xG features exist in df
-    features = base_features.copy()
+    features = select_features(df)
     if 'Home_Form_xG' in df.columns:
-        features.extend(xg_features)
         print(f"Training Advanced Model (with xG) for {league_code}")
     else:
         print(f"Training Basic Model (no xG) for {league_code}")
         
     if 'Home_Rain' in df.columns:
-        features.extend(weather_features)
         print("Included Weather Features")
         
     target = 'Result' # 0: Home, 1: Draw, 2: Away
@@ -93,17 +109,181 @@ def train_model(df, league_code='E0'):
     print(importances)
     
     # Save model
-    os.makedirs('models', exist_ok=True)
-    model_path = f'models/model_{league_code}.pkl'
-    with open(model_path, 'wb') as f:
-        pickle.dump(model, f)
-    print(f"Model saved to {model_path}")
+    save_model(model, league_code, X_check=X_test, state=fit_state(df, X_test.index, y_test, y_prob))
         
     return model, X_test, y_test, y_prob
 
-def evaluate_betting_strategy(X_test, y_test, y_prob):
+def save_model(model, league_code='E0', X_check=None, state=None):
+    """
+    Saves the pickled model and its compact NumPy copy for fast single-fixture
+    scoring (checked against sklearn on X_check).
+    Both are published together as a new version of the model_{league_code}
+    snapshot (see src/publish.py), and models/model_{league_code}.pkl/.npz are
+    atomically replaced, so running readers never see a half-written model.
+    state: the model's incremental update state (see fit_state), published in
+    the same version so it always describes the current model.
+    """
+    def write_pickle(path):
+        with open(path, 'wb') as f:
+            pickle.dump(model, f)
+    
+    def write_state(path):
+        with open(path, 'w') as f:
+            json.dump(state, f, indent=2)
+    
+    writers = {
+        'model.pkl': write_pickle,
+        'model.npz': lambda path: export_model(model, path, X_check=X_check),
+    }
+    if state is not None:
+        writers['update_state.json'] = write_state
+    
+    model_path = f'models/model_{league_code}.pkl'
+    pointer = publish(f'model_{league_code}', writers,
+                      legacy={'model.pkl': model_path, 'model.npz': f'models/model_{league_code}.npz'})
+    print(f"Model saved to {model_path} (version {pointer['version']})")
+
+def fit_state(df, test_index, y_test, y_prob):
+    """
+    Update state of a freshly trained model (see update_model): it was fitted
+    on every match before its test period, and its test log loss is what
+    later incremental updates are checked against. None without match dates.
+    """
+    if 'Date' not in df.columns:
+        return None
+    dates = pd.to_datetime(df['Date'], format='mixed')
+    test_start = dates.loc[test_index].min()
+    return {
+        'fitted_until': str(dates[dates < test_start].max().date()),
+        'reference_loss': float(log_loss(y_test, y_prob, labels=[0, 1, 2])),
+        'updates_since_full': 0,
+    }
+
+def load_update_state(league_code='E0'):
+    """
+    The current model_{league_code} and its update state, both read from the
+    same published version. (None, None) if nothing was published; the state
+    is None for models saved without one.
+    """
+    name = f'model_{league_code}'
+    pointer = read_pointer(name)
+    if pointer is None:
+        return None, None
+    version_dir = os.path.join(SNAPSHOT_DIR, name, pointer['version'])
+    with open(os.path.join(version_dir, 'model.pkl'), 'rb') as f:
+        model = pickle.load(f)
+    state = None
+    if 'update_state.json' in pointer['files']:
+        with open(os.path.join(version_dir, 'update_state.json')) as f:
+            state = json.load(f)
+    return model, state
+
+def update_model(df, league_code='E0', new_iters=10, learning_rate=0.02, recent_matches=760,
+                 holdout_weeks=2, full_every=8, tolerance=0.01, drift_tolerance=0.15):
+    """
+    Incremental weekly update: adds `new_iters` boosting iterations (see
+    add_iterations) fitted on a recent window ending with the matches
+    completed since the model was last fitted, instead of retraining from scratch.
+    The added trees use a smaller learning_rate so a few weeks of data cannot
+    undo what the full model learned.
+    
+    The last `holdout_weeks` matchweeks are a short holdout: a candidate fitted
+    without them must not make their log loss worse by more than `tolerance`.
+    If it passes, the update is refitted on everything up to the newest match
+    (so this week's results are learned) and saved; if it fails, nothing moves
+    and the same matches are tried again next time. Falls back to a full
+    train_model() every `full_every` updates, when there is no previous model,
+    or when holdout loss has drifted more than `drift_tolerance` above the
+    last full retrain's (the holdout is small, so this is deliberately loose).
+    The state is published with the model (see save_model), so any retrain,
+    including the pipeline's or the app's, resets it.
+    """
+    model, state = load_update_state(league_code)
+    
+    if state is None or state['updates_since_full'] + 1 >= full_every:
+        print("Running full retrain (no previous model or scheduled refresh).")
+        return train_model(df, league_code)[0]
+    
+    features = list(model.feature_names_in_)
+    rows = df.dropna(subset=features + ['Result']).sort_values('Date', kind='stable')
+    dates = pd.to_datetime(rows['Date'], format='mixed')
+    
+    new_rows = rows[dates > pd.Timestamp(state['fitted_until'])]
+    if new_rows.empty:
+        print("No newly completed matches since the last update.")
+        return model
+    
+    weeks = matchweeks(dates)
+    in_holdout = weeks >= np.unique(weeks)[-holdout_weeks]
+    if in_holdout.all():
+        print("Not enough matches for an incremental update.")
+        return model
+    holdout = rows[in_holdout]
+    X_hold, y_hold = holdout[features], holdout['Result']
+    
+    def warm_start(window):
+        return add_iterations(model, window[features], window['Result'], new_iters, learning_rate)
+    
+    # Candidate without the holdout weeks, to check the update does not hurt on unseen matches
+    candidate = warm_start(rows[~in_holdout].iloc[-recent_matches:])
+    loss_before = log_loss(y_hold, model.predict_proba(X_hold), labels=model.classes_)
+    loss_after = log_loss(y_hold, candidate.predict_proba(X_hold), labels=model.classes_)
+    
+    new_dates = pd.to_datetime(new_rows['Date'], format='mixed')
+    print(f"Incremental update on {len(new_rows)} new matches "
+          f"({new_dates.min().date()} to {new_dates.max().date()}, +{new_iters} iterations)")
+    print(f"Holdout Log Loss ({len(holdout)} matches): {loss_before:.4f} -> {loss_after:.4f}")
+    
+    if loss_after > state['reference_loss'] * (1 + drift_tolerance):
+        print("Holdout loss drifted from the last full retrain. Running full retrain.")
+        return train_model(df, league_code)[0]
+    
+    if loss_after > loss_before * (1 + tolerance):
+        print("Update made the holdout worse; keeping the current model.")
+        return model
+    
+    # Accepted: fit the same update on a window that ends with the newest results
+    updated = warm_start(rows.iloc[-max(recent_matches, len(new_rows)):])
+    state = dict(state, fitted_until=str(dates.max().date()),
+                 updates_since_full=state['updates_since_full'] + 1)
+    save_model(updated, league_code, X_check=X_hold, state=state)
+    return updated
+
+def add_iterations(model, X, y, new_iters=10, learning_rate=0.02):
+    """
+    Copy of a fitted HistGradientBoostingClassifier with `new_iters` more
+    boosting iterations fitted on (X, y).
+    Plain warm_start re-bins X on every fit and scores the existing trees on
+    the new bins with their old bin thresholds, so the added trees would be
+    fitted to the gradients of a different model. Here they start from the
+    model's actual raw predictions on X.
+    """
+    updated = pickle.loads(pickle.dumps(model))
+    # Without early stopping the only raw prediction made during fit is for the training rows
+    updated.set_params(warm_start=True, early_stopping=False,
+                       max_iter=model.n_iter_ + new_iters, learning_rate=learning_rate)
+    margin = model._raw_predict(X)
+    
+    def raw_predict(X_binned, n_threads=None):
+        if X_binned.shape[0] != margin.shape[0]:
+            raise ValueError("Unexpected raw prediction during the warm-start fit.")
+        return np.array(margin, order='F')
+    
+    updated._raw_predict = raw_predict
+    try:
+        updated.fit(X, y)
+    finally:
+        del updated._raw_predict
+    return updated
+
+def evaluate_betting_strategy(X_test, y_test, y_prob, staking='flat', rounds=None,
+                              return_ledger=False, **kelly_kwargs):
     """
     Simple simulation of a value betting strategy.
+    staking='flat' places independent 10-unit bets one at a time.
+    staking='kelly' sizes every round (e.g. a matchweek, see matchweeks()) together
+    with fractional Kelly; rounds are aligned with X_test and settled in order.
+    With return_ledger=True also returns the per-bet ledger (Round, Stake, Odds, Won, PnL).
     """
     results = X_test.copy()
     results['Actual'] = y_test
@@ -123,29 +303,81 @@ def evaluate_betting_strategy(X_test, y_test, y_prob):
     
     bets_placed = 0
     wins = 0
+    total_staked = 0
+    ledger = []
+    
+    if rounds is None:
+        rounds = np.arange(len(results))
+    results['Round'] = np.asarray(rounds)
     
-    for idx, row in results.iterrows():
-        if row['Prob_H'] > row['Implied_H'] * threshold:
-            bets_placed += 1
-            bankroll -= bet_size
-            if row['Actual'] == 0: 
-                bankroll += bet_size * row['B365H']
-                wins += 1
+    if staking == 'kelly':
+        # Bets within a round are sized together and settle together
+        kelly_kwargs.setdefault('min_edge', threshold - 1)
         
-        elif row['Prob_A'] > row['Implied_A'] * threshold:
-            bets_placed += 1
-            bankroll -= bet_size
-            if row['Actual'] == 2: 
-                bankroll += bet_size * row['B365A']
-                wins += 1
+        for _, group in results.groupby('Round', sort=True):
+            probs = group[['Prob_H', 'Prob_D', 'Prob_A']].to_numpy()
+            odds = group[ODDS_COLS].to_numpy()
+            stakes, picks = kelly_stakes(probs, odds, bankroll, **kelly_kwargs)
+            
+            placed = picks >= 0
+            if not placed.any():
+                continue
+            won = placed & (group['Actual'].to_numpy() == picks)
+            bet_odds = odds[np.arange(len(picks)), np.maximum(picks, 0)]
+            
+            ledger.append(pd.DataFrame({
+                'Round': group['Round'].to_numpy()[placed],
+                'Stake': stakes[placed],
+                'Odds': bet_odds[placed],
+                'Won': won[placed],
+                'PnL': (stakes * np.where(won, bet_odds - 1, -1))[placed],
+            }))
+            
+            bets_placed += int(placed.sum())
+            wins += int(won.sum())
+            total_staked += stakes.sum()
+            bankroll += (stakes * np.where(won, bet_odds, 0)).sum() - stakes.sum()
+    else:
+        bets = []
+        for idx, row in results.iterrows():
+            if row['Prob_H'] > row['Implied_H'] * threshold:
+                bets_placed += 1
+                bankroll -= bet_size
+                won = row['Actual'] == 0
+                if won: 
+                    bankroll += bet_size * row['B365H']
+                    wins += 1
+                bets.append((row['Round'], bet_size, row['B365H'], won))
+            
+            elif row['Prob_A'] > row['Implied_A'] * threshold:
+                bets_placed += 1
+                bankroll -= bet_size
+                won = row['Actual'] == 2
+                if won: 
+                    bankroll += bet_size * row['B365A']
+                    wins += 1
+                bets.append((row['Round'], bet_size, row['B365A'], won))
+        total_staked = bets_placed * bet_size
+        
+        bets = pd.DataFrame(bets, columns=['Round', 'Stake', 'Odds', 'Won'])
+        bets['PnL'] = np.where(bets['Won'], bets['Stake'] * (bets['Odds'] - 1), -bets['Stake'])
+        ledger.append(bets)
                 
-    roi = (bankroll - initial_bankroll) / (bets_placed * bet_size) if bets_placed > 0 else 0
+    roi = (bankroll - initial_bankroll) / total_staked if total_staked > 0 else 0
     
-    print(f"\n--- Betting Simulation ---")
+    print(f"\n--- Betting Simulation ({staking}) ---")
     print(f"Initial Bankroll: {initial_bankroll}")
     print(f"Final Bankroll: {bankroll:.2f}")
     print(f"Bets Placed: {bets_placed}")
     print(f"Win Rate: {wins/bets_placed:.2%}" if bets_placed > 0 else "Win Rate: N/A")
     print(f"ROI: {roi:.2%}")
     
+    if return_ledger:
+        ledger = pd.concat(ledger, ignore_index=True) if ledger else pd.DataFrame(
+            columns=['Round', 'Stake', 'Odds', 'Won', 'PnL'])
+        return bankroll, ledger
     return bankroll
+
+def matchweeks(dates):
+    """Groups match dates into betting rounds (Friday to Thursday weeks)."""
+    return pd.to_datetime(pd.Series(dates), format='mixed').dt.to_period('W-THU').to_numpy()
@@ -0,0 +1,243 @@
+import glob
+import hashlib
+import json
+import os
+import numpy as np
+from src.fileio import file_digest
+from src.publish import publish, read_pointer, load_current, current_path, SNAPSHOT_DIR
+
+DEFAULT_ODDS = {'B365H': 2.0, 'B365D': 3.0, 'B365A': 4.0}
+
+def model_path(league_code):
+    """The league's current compact model (falls back to the plain file from older runs)."""
+    return current_path(f'model_{league_code}', 'model.npz') or f'models/model_{league_code}.npz'
+
+def form_path(league_code):
+    """The league's current team form snapshot (falls back to the plain file from older runs)."""
+    return current_path(f'team_form_{league_code}', 'team_form.json') or f'data/team_form_{league_code}.json'
+
+def _version_digest(name, filename, fallback):
+    # Published snapshots carry their digest in the pointer; hash plain files otherwise
+    pointer = read_pointer(name)
+    if pointer is not None and filename in pointer['files']:
+        return pointer['files'][filename]
+    return file_digest(fallback)
+
+def fingerprint(league_code, odds=DEFAULT_ODDS):
+    """
+    Identifies the inputs of a league's matrix: model version, team form
+    snapshot and the odds used. None if the model or team form is missing.
+    """
+    model = _version_digest(f'model_{league_code}', 'model.npz', f'models/model_{league_code}.npz')
+    form = _version_digest(f'team_form_{league_code}', 'team_form.json', f'data/team_form_{league_code}.json')
+    if model is None or form is None:
+        return None
+    key = json.dumps({'model': model, 'form': form, 'odds': odds}, sort_keys=True)
+    return hashlib.sha256(key.encode()).hexdigest()
+
+class PairMatrix:
+    """
+    Model probabilities for every home/away pair of a league's teams.
+    probs[i, j] = (P(home win), P(draw), P(away win)) for teams[i] at home
+    against teams[j], at the default odds. NaN on the diagonal and for teams
+    without enough recent matches to compute form.
+    """
+    def __init__(self, arrays):
+        self.teams = [str(t) for t in arrays['teams']]
+        self.stats = [str(s) for s in arrays['stats']]
+        self.form = arrays['form']
+        self.probs = arrays['probs']
+        self.odds = dict(zip(DEFAULT_ODDS, arrays['odds'].tolist()))
+        self.fingerprint = str(arrays['fingerprint'])
+        self.index = {team: i for i, team in enumerate(self.teams)}
+
+    def lookup(self, home_team, away_team):
+        """H/D/A probabilities for the fixture, or None if it cannot be scored."""
+        i, j = self.index.get(home_team), self.index.get(away_team)
+        if i is None or j is None or np.isnan(self.probs[i, j, 0]):
+            return None
+        return self.probs[i, j]
+
+    def features(self, home_team, away_team):
+        """
+        The fixture's feature row (Home_*/Away_* form and the default odds) as
+        a 1-row DataFrame, like calculate_features gives for an upcoming match.
+        None if the fixture cannot be scored.
+        """
+        if self.lookup(home_team, away_team) is None:
+            return None
+        import pandas as pd
+
+        row = {'HomeTeam': home_team, 'AwayTeam': away_team, **self.odds}
+        home, away = self.form[self.index[home_team]], self.form[self.index[away_team]]
+        row.update({f'Home_{s}': v for s, v in zip(self.stats, home)})
+        row.update({f'Away_{s}': v for s, v in zip(self.stats, away)})
+        return pd.DataFrame([row])
+
+def missing_features(feature_names, stats, odds=DEFAULT_ODDS):
+    """
+    Model features that are neither odds nor Home_/Away_ form stats, i.e. that
+    a fixture cannot be scored with from the team form snapshot alone
+    (e.g. head-to-head or weather columns).
+    """
+    return [name for name in feature_names
+            if name not in odds and not (name[:5] in ('Home_', 'Away_') and name[5:] in stats)]
+
+def _form_table(teams):
+    # Team names, stat names, the (teams, stats) form array (NaN for missing values) and stat -> column
+    names = sorted(teams)
+    stats = sorted({s for form in teams.values() for s in form})
+    form = np.array([[np.nan if teams[t].get(s) is None else teams[t][s] for s in stats] for t in names],
+                    dtype=np.float64).reshape(len(names), len(stats))
+    return names, stats, form, {s: k for k, s in enumerate(stats)}
+
+def _fixture_features(model, form, stat_index, home_idx, away_idx, odds):
+    # One row per fixture; odds values are scalars or one price per fixture
+    X = np.empty((len(home_idx), len(model.feature_names)))
+    for j, name in enumerate(model.feature_names):
+        if name in odds:
+            X[:, j] = odds[name]
+        elif name.startswith('Home_'):
+            X[:, j] = form[home_idx, stat_index[name[5:]]]
+        else:
+            X[:, j] = form[away_idx, stat_index[name[5:]]]
+    return X
+
+def build_pair_matrix(model, teams, odds=DEFAULT_ODDS):
+    """
+    Scores all N x (N-1) fixtures between `teams` ({team: form stats}, as in the
+    team form snapshot) with one batched predict_proba of the compact model.
+    Returns the arrays stored by materialize(). Raises ValueError if the model
+    needs features the snapshot cannot supply (see missing_features).
+    """
+    names, stats, form, stat_index = _form_table(teams)
+    missing = missing_features(model.feature_names, stats, odds)
+    if missing:
+        raise ValueError(f"Model features not available from team form: {', '.join(missing)}")
+
+    n = len(names)
+    home_idx, away_idx = np.divmod(np.arange(n * n), n)
+    pairs = home_idx != away_idx
+    home_idx, away_idx = home_idx[pairs], away_idx[pairs]
+
+    X = _fixture_features(model, form, stat_index, home_idx, away_idx, odds)
+
+    probs = np.full((n, n, 3), np.nan)
+    if len(X):
+        probs[home_idx, away_idx] = model.predict_proba(X)
+
+    # Same rule as the single-fixture path: no prediction without a full form window
+    if 'Form_Points' in stat_index:
+        missing = np.isnan(form[:, stat_index['Form_Points']])
+        probs[missing, :, :] = np.nan
+        probs[:, missing, :] = np.nan
+
+    return {
+        'teams': np.asarray(names, dtype=str),
+        'stats': np.asarray(stats, dtype=str),
+        'form': form,
+        'probs': probs,
+        'odds': np.asarray([odds[k] for k in DEFAULT_ODDS], dtype=np.float64),
+    }
+
+def _load(path):
+    with np.load(path, allow_pickle=False) as data:
+        return PairMatrix({k: data[k] for k in data.files})
+
+def load_pair_matrix(league_code='E0'):
+    """
+    The league's matrix if it is up to date with the current model and team
+    form, else None. Cached per process; reloaded only when republished.
+    """
+    current = fingerprint(league_code)
+    if current is None:
+        return None
+    matrix = load_current(f'pairs_{league_code}', 'pairs.npz', _load)
+    if matrix is None or matrix.fingerprint != current:
+        return None
+    return matrix
+
+def materialize(league_code='E0', force=False):
+    """
+    Builds and publishes models/pairs_{league_code}.npz from the current
+    compact model and team form snapshot, unless it is already up to date.
+    Returns the PairMatrix (None if the model or team form is missing, or the
+    model needs features the team form cannot supply).
+    """
+    from src.tree_export import load_compact_model
+
+    current = fingerprint(league_code)
+    if current is None:
+        return None
+    if not force:
+        matrix = load_pair_matrix(league_code)
+        if matrix is not None:
+            return matrix
+
+    model = load_compact_model(model_path(league_code))
+    with open(form_path(league_code)) as f:
+        teams = json.load(f)['teams']
+
+    try:
+        arrays = build_pair_matrix(model, teams)
+    except ValueError as e:
+        print(f"Cannot precompute fixtures for {league_code}: {e}")
+        return None
+    arrays['fingerprint'] = np.asarray(current)
+    publish(f'pairs_{league_code}', {'pairs.npz': lambda path: np.savez(path, **arrays)},
+            legacy={'pairs.npz': f'models/pairs_{league_code}.npz'})
+    n = len(arrays['teams'])
+    print(f"Precomputed {n * (n - 1)} fixtures for {league_code} to models/pairs_{league_code}.npz")
+    return PairMatrix(arrays)
+
+def score_fixtures(fixtures, league_code='E0'):
+    """
+    Model probabilities for a batch of fixtures at their own prices, in one
+    predict_proba of the current compact model. fixtures: DataFrame with
+    HomeTeam, AwayTeam and B365H/B365D/B365A (e.g. a matchday's fixture list).
+    Rows with an unknown team or without a full form window get NaN.
+    Returns an (n_fixtures, 3) array in H/D/A order.
+    """
+    from src.tree_export import load_compact_model
+
+    model = load_compact_model(model_path(league_code))
+    with open(form_path(league_code)) as f:
+        teams = json.load(f)['teams']
+
+    names, stats, form, stat_index = _form_table(teams)
+    missing = missing_features(model.feature_names, stats)
+    if missing:
+        raise ValueError(f"Model features not available from team form: {', '.join(missing)}")
+    # Unknown teams point at an all-NaN row appended to the form table
+    form = np.vstack([form, np.full(len(stats), np.nan)])
+    index = {team: i for i, team in enumerate(names)}
+
+    home_idx = np.array([index.get(t, len(names)) for t in fixtures['HomeTeam']], dtype=np.int64)
+    away_idx = np.array([index.get(t, len(names)) for t in fixtures['AwayTeam']], dtype=np.int64)
+    odds = {col: fixtures[col].to_numpy(dtype=float) for col in DEFAULT_ODDS}
+    X = _fixture_features(model, form, stat_index, home_idx, away_idx, odds)
+
+    probs = model.predict_proba(X) if len(X) else np.empty((0, 3))
+    if 'Form_Points' in stat_index:
+        points = form[:, stat_index['Form_Points']]
+        probs[np.isnan(points[home_idx]) | np.isnan(points[away_idx])] = np.nan
+    return probs
+
+def available_leagues():
+    """Leagues with a compact model (published or plain file)."""
+    published = [os.path.basename(p)[len('model_'):] for p in glob.glob(os.path.join(SNAPSHOT_DIR, 'model_*'))]
+    plain = [os.path.basename(p)[len('model_'):-len('.npz')] for p in glob.glob('models/model_*.npz')]
+    return sorted(set(published + plain))
+
+def materialize_all(leagues=None, force=False):
+    """Materializes every league (default: all with a model). Returns {league: PairMatrix or None}."""
+    return {code: materialize(code, force=force) for code in (leagues or available_leagues())}
+
+if __name__ == "__main__":
+    # python -m src.pair_matrix [league ...]
+    import sys
+    import time
+
+    start = time.time()
+    built = materialize_all(sys.argv[1:] or None)
+    print(f"{sum(m is not None for m in built.values())} leagues up to date in {time.time() - start:.2f}s")
@@ -0,0 +1,146 @@
+import hashlib
+import importlib.util
+import inspect
+import json
+import os
+import pickle
+import time
+from src.fileio import file_digest, atomic_write, atomic_write_json
+
+PIPELINE_CACHE_DIR = 'data/.pipeline_cache'
+
+def _code_digest(objects):
+    # Source of the modules the stage's code lives in, so edits invalidate the stage.
+    # Modules given by name ('src.model') are read from disk without importing them
+    h = hashlib.sha256()
+    for obj in objects:
+        if isinstance(obj, str):
+            spec = importlib.util.find_spec(obj)
+            if spec is None or not spec.origin or not os.path.exists(spec.origin):
+                raise ValueError(f"No source found for module '{obj}'")
+            with open(spec.origin, encoding='utf-8') as f:
+                h.update(f.read().encode())
+            continue
+        try:
+            h.update(inspect.getsource(inspect.getmodule(obj)).encode())
+        except (TypeError, OSError):
+            h.update(getattr(obj, '__qualname__', repr(obj)).encode())
+    return h.hexdigest()
+
+class Stage:
+    def __init__(self, name, func, deps=(), params=None, inputs=(), outputs=(), code=(), ttl=None):
+        self.name = name
+        self.func = func
+        self.deps = list(deps)          # upstream stage names, passed to func in order
+        self.params = params or {}      # keyword arguments, part of the cache key
+        self.inputs = list(inputs)      # files whose contents are part of the cache key
+        self.outputs = list(outputs)    # files the stage writes; rerun if any is missing or changed
+        self.code = [func] + list(code) # code (or module names) whose source is part of the cache key
+        self.ttl = ttl                  # seconds, for stages reading external sources (downloads)
+
+class Pipeline:
+    """
+    Small DAG executor with stage-level caching.
+    Each stage's output is pickled and keyed by a hash of its parameters, code,
+    input files and the output hashes of the stages it depends on. A stage only
+    reruns when that key changes (or its TTL expires); if a rerun produces the
+    same output, everything downstream stays cached. Cached outputs are only
+    loaded when a stage that actually reruns needs them.
+    """
+    def __init__(self, cache_dir=PIPELINE_CACHE_DIR):
+        self.cache_dir = cache_dir
+        self.stages = {}
+        self.manifest_path = os.path.join(cache_dir, 'manifest.json')
+        self.manifest = {}
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path) as f:
+                self.manifest = json.load(f)
+        self._values = {}
+
+    def stage(self, name, func, **kwargs):
+        self.stages[name] = Stage(name, func, **kwargs)
+        return self
+
+    def _order(self, targets):
+        order, seen = [], set()
+        def visit(name, path=()):
+            if name in path:
+                raise ValueError(f"Cycle in pipeline at stage '{name}'")
+            if name in seen:
+                return
+            for dep in self.stages[name].deps:
+                visit(dep, path + (name,))
+            seen.add(name)
+            order.append(name)
+        for target in targets:
+            visit(target)
+        return order
+
+    def _key(self, stage):
+        h = hashlib.sha256()
+        h.update(stage.name.encode())
+        h.update(json.dumps(stage.params, sort_keys=True, default=repr).encode())
+        h.update(_code_digest(stage.code).encode())
+        for path in stage.inputs:
+            h.update(f"{path}:{file_digest(path)}".encode())
+        for dep in stage.deps:
+            h.update(self.manifest[dep]['output_hash'].encode())
+        return h.hexdigest()
+
+    def _is_fresh(self, stage, key):
+        entry = self.manifest.get(stage.name)
+        if entry is None or entry['key'] != key or not os.path.exists(entry['path']):
+            return False
+        if stage.ttl is not None and time.time() - entry['ran_at'] > stage.ttl:
+            return False
+        # Outputs replaced outside the pipeline (e.g. main.py --update, an app retrain)
+        recorded = entry.get('output_files', {})
+        return all(p in recorded and file_digest(p) == recorded[p] for p in stage.outputs)
+
+    def load(self, name):
+        """Output of a stage (from memory or its cache file)."""
+        if name not in self._values:
+            with open(self.manifest[name]['path'], 'rb') as f:
+                self._values[name] = pickle.load(f)
+        return self._values[name]
+
+    def run(self, targets=None, force=()):
+        """
+        Runs whatever is stale for the targets (default: every stage).
+        force: stage names to rerun regardless of their cache.
+        Returns {stage: 'cached' | 'ran'}.
+        """
+        targets = targets or list(self.stages)
+        status = {}
+        for name in self._order(targets):
+            stage = self.stages[name]
+            key = self._key(stage)
+            if name not in force and self._is_fresh(stage, key):
+                status[name] = 'cached'
+                print(f"[pipeline] {name}: up to date")
+                continue
+
+            print(f"[pipeline] {name}: running...")
+            start = time.time()
+            value = stage.func(*[self.load(dep) for dep in stage.deps], **stage.params)
+            self._save(stage, key, value, start)
+            status[name] = 'ran'
+            print(f"[pipeline] {name}: done in {time.time() - start:.1f}s")
+        return status
+
+    def _save(self, stage, key, value, start):
+        name = stage.name
+        data = pickle.dumps(value)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = os.path.join(self.cache_dir, f'{name}.pkl')
+        atomic_write(path, data)
+
+        self._values[name] = value
+        self.manifest[name] = {
+            'key': key,
+            'output_hash': hashlib.sha256(data).hexdigest(),
+            'path': path,
+            'ran_at': start,
+            'output_files': {p: file_digest(p) for p in stage.outputs},
+        }
+        atomic_write_json(self.manifest_path, self.manifest, indent=2)
@@ -0,0 +1,154 @@
+import json
+import os
+import shutil
+import threading
+import time
+from src.fileio import file_digest, atomic_write_json
+
+SNAPSHOT_DIR = 'snapshots'
+
+# Versions kept per snapshot besides the current one, so readers that resolved
+# the previous pointer a moment ago can still open its files
+KEEP_VERSIONS = 3
+
+def _pointer_path(name, root=SNAPSHOT_DIR):
+    return os.path.join(root, name, 'CURRENT.json')
+
+def publish(name, writers, legacy=None, keep=KEEP_VERSIONS, root=SNAPSHOT_DIR):
+    """
+    Publishes an immutable, versioned snapshot of one or more files.
+    writers: {filename: function(path) that writes the file}. Everything is
+    written into a fresh version directory first; only then is the CURRENT.json
+    pointer switched (os.replace), so readers see the old or the new snapshot,
+    never a mix or a half-written file.
+    legacy: {filename: path} fixed paths (e.g. models/model_E0.pkl) that are
+    atomically replaced with the new files, for code that reads them directly.
+    Each file is replaced on its own, one after the other and after the pointer
+    switch, so a reader opening two legacy paths (e.g. the .pkl and the .npz)
+    can briefly get one new and one old file; read from the snapshot for a
+    consistent set.
+    Returns the new pointer ({'version', 'files': {filename: sha256}}).
+    """
+    version = f"v{time.time_ns()}-{os.getpid()}"
+    version_dir = os.path.join(root, name, version)
+    # Nothing reads a version directory until the pointer names it
+    os.makedirs(version_dir)
+    for filename, write in writers.items():
+        write(os.path.join(version_dir, filename))
+    files = {filename: file_digest(os.path.join(version_dir, filename)) for filename in writers}
+
+    pointer = {'version': version, 'published_at': time.time(), 'files': files}
+    atomic_write_json(_pointer_path(name, root), pointer, indent=2)
+
+    for filename, path in (legacy or {}).items():
+        _replace_file(os.path.join(version_dir, filename), path)
+
+    prune(name, keep=keep, root=root)
+    return pointer
+
+def _replace_file(src, dst):
+    # Snapshot files are never modified, so a hard link is as good as a copy
+    os.makedirs(os.path.dirname(dst) or '.', exist_ok=True)
+    tmp = f"{dst}.{os.getpid()}.tmp"
+    if os.path.exists(tmp):
+        os.remove(tmp)
+    try:
+        os.link(src, tmp)
+    except OSError:
+        shutil.copyfile(src, tmp)
+    os.replace(tmp, dst)
+
+def prune(name, keep=KEEP_VERSIONS, root=SNAPSHOT_DIR):
+    """Removes all but the current version and the `keep` newest older ones."""
+    current = read_pointer(name, root)
+    if current is None:
+        return
+    base = os.path.join(root, name)
+    versions = sorted(v for v in os.listdir(base) if v.startswith('v') and v < current['version'])
+    for version in versions[:max(len(versions) - keep, 0)]:
+        shutil.rmtree(os.path.join(base, version), ignore_errors=True)
+
+def read_pointer(name, root=SNAPSHOT_DIR):
+    """The current pointer of a snapshot, or None if nothing was published yet."""
+    try:
+        with open(_pointer_path(name, root)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def current_path(name, filename, root=SNAPSHOT_DIR):
+    """Path of a file in the current version of a snapshot (None if unpublished)."""
+    pointer = read_pointer(name, root)
+    if pointer is None or filename not in pointer['files']:
+        return None
+    return os.path.join(root, name, pointer['version'], filename)
+
+class SnapshotReader:
+    """
+    Long-lived reader for a published snapshot (e.g. in the app or a scanner).
+    Each get() costs one os.stat of the pointer; when a new version has been
+    published only the files whose contents changed are loaded again, and
+    callers keep using the previous objects until the new ones are ready.
+    """
+    def __init__(self, name, root=SNAPSHOT_DIR):
+        self.name = name
+        self.root = root
+        self._stat = None
+        self._pointer = None
+        self._loaded = {}  # filename: (sha256, value)
+        self._lock = threading.Lock()
+
+    def _refresh(self):
+        try:
+            st = os.stat(_pointer_path(self.name, self.root))
+        except OSError:
+            return
+        stamp = (st.st_ino, st.st_mtime_ns, st.st_size)
+        if stamp != self._stat:
+            pointer = read_pointer(self.name, self.root)
+            if pointer is not None:
+                self._pointer, self._stat = pointer, stamp
+
+    @property
+    def version(self):
+        self._refresh()
+        return self._pointer['version'] if self._pointer else None
+
+    def get(self, filename, loader):
+        """
+        The current contents of `filename`, as loaded by loader(path).
+        Returns None if the snapshot (or that file) has not been published.
+        """
+        self._refresh()
+        pointer = self._pointer
+        if pointer is None or filename not in pointer['files']:
+            return None
+        digest = pointer['files'][filename]
+        cached = self._loaded.get(filename)
+        if cached is not None and cached[0] == digest:
+            return cached[1]
+
+        # While another thread loads the new version, keep serving the old one
+        if not self._lock.acquire(blocking=cached is None):
+            return cached[1]
+        try:
+            cached = self._loaded.get(filename)
+            if cached is not None and cached[0] == digest:
+                return cached[1]
+            value = loader(os.path.join(self.root, self.name, pointer['version'], filename))
+            self._loaded[filename] = (digest, value)
+            return value
+        finally:
+            self._lock.release()
+
+_readers = {}
+_readers_lock = threading.Lock()
+
+def load_current(name, filename, loader, root=SNAPSHOT_DIR):
+    """
+    Process-wide cached load of a published file: reloaded only when a new
+    version with different contents is published. None if unpublished.
+    """
+    with _readers_lock:
+        reader = _readers.setdefault((root, name), SnapshotReader(name, root))
+    return reader.get(filename, loader)
@@ -0,0 +1,156 @@
+import pandas as pd
+import numpy as np
+
+ODDS_COLS = ['B365H', 'B365D', 'B365A']
+
+# Home and away wins: the outcomes the backtest bets on (see evaluate_betting_strategy)
+KELLY_OUTCOMES = (0, 2)
+
+def kelly_stakes(probs, odds, bankroll, fraction=0.25, min_edge=0.05, max_stake=0.05,
+                 max_exposure=0.25, outcomes=KELLY_OUTCOMES, n_scenarios=2048, random_state=0):
+    """
+    Sizes simultaneous fractional-Kelly bets for one round of fixtures.
+    probs and odds are (n_fixtures, 3) arrays in H/D/A order.
+    At most one outcome is backed per fixture (the one with the biggest edge)
+    and fixtures are independent. The stakes jointly maximize the round's
+    expected log growth, so bets that settle together are smaller than the same
+    bets sized one at a time, and are then scaled by `fraction`. Each stake is
+    at most max_stake of the bankroll and the round's total at most
+    max_exposure; both are constraints of the optimization.
+    The expectation is exact over every win/loss combination while there are
+    at most log2(n_scenarios) bets, and taken over n_scenarios sampled
+    combinations (seeded by random_state) beyond that.
+    Returns (stakes, picks): stake per fixture and the outcome index (-1 = no bet).
+    """
+    probs = np.asarray(probs, dtype=float)
+    odds = np.asarray(odds, dtype=float)
+
+    # Expected return per unit staked for every outcome
+    edge = probs * odds - 1
+
+    # Only consider outcomes we are allowed to back and that clear the edge threshold
+    allowed = np.zeros(probs.shape[1], dtype=bool)
+    allowed[list(outcomes)] = True
+    valid = allowed & (edge > min_edge) & (odds > 1) & np.isfinite(edge)
+
+    # Outcomes of a fixture are mutually exclusive, so back the best one only
+    picks = np.argmax(np.where(valid, edge, -np.inf), axis=1)
+    picks = np.where(valid.any(axis=1), picks, -1)
+
+    stakes = np.zeros(len(probs))
+    bets = np.flatnonzero(picks >= 0)
+    if len(bets):
+        p = probs[bets, picks[bets]]
+        net_odds = odds[bets, picks[bets]] - 1
+        # Full-Kelly fractions, so the caps are scaled up by 1 / fraction
+        full = _joint_kelly(p, net_odds, max_stake / fraction, max_exposure / fraction,
+                            n_scenarios, random_state)
+        stakes[bets] = fraction * full * bankroll
+    return stakes, picks
+
+def _scenarios(p, net_odds, n_scenarios, random_state):
+    # (scenarios, bets) matrix of returns per unit staked, and the scenario probabilities
+    k = len(p)
+    if 2 ** k <= n_scenarios:
+        won = (np.arange(2 ** k)[:, None] >> np.arange(k)) & 1 == 1
+        weights = np.where(won, p, 1 - p).prod(axis=1)
+    else:
+        rng = np.random.default_rng(random_state)
+        lose_all = np.prod(1 - p)
+        # Every bet losing is kept as its own scenario: it bounds the total stake below the bankroll
+        won = np.vstack([rng.random((n_scenarios, k)) < p, np.zeros(k, dtype=bool)])
+        weights = np.append(np.full(n_scenarios, (1 - lose_all) / n_scenarios), lose_all)
+    return np.where(won, net_odds, -1.0), weights
+
+def _project(f, cap, budget):
+    # Euclidean projection onto {0 <= f <= cap, sum(f) <= budget}
+    clipped = np.clip(f, 0, cap)
+    if clipped.sum() <= budget:
+        return clipped
+    # Otherwise shift everything down by the multiplier that makes the total fit.
+    # sum(clip(f - m, 0, cap)) = sum(max(f - m, 0)) - sum(max(f - cap - m, 0)) is piecewise
+    # linear and decreasing in m with kinks at f and f - cap, so interpolate between kinks
+    kinks = np.sort(np.append(np.concatenate([f, f - cap]), 0.0))
+    kinks = kinks[kinks >= 0]
+    totals = _excess(f, kinks) - _excess(f - cap, kinks)
+    return np.clip(f - np.interp(-budget, -totals, kinks), 0, cap)
+
+def _excess(values, points):
+    # sum(max(values - x, 0)) for every x in points
+    values = np.sort(values)
+    suffix = np.append(np.cumsum(values[::-1])[::-1], 0.0)
+    i = np.searchsorted(values, points, side='right')
+    return suffix[i] - points * (len(values) - i)
+
+def _joint_kelly(p, net_odds, cap, budget, n_scenarios, random_state, tol=1e-8, max_iter=1000):
+    """
+    Fractions of the bankroll maximizing E[log(1 + sum(f * return))] over
+    independent bets, with f <= cap and sum(f) <= budget. Projected gradient
+    ascent with backtracking, started from the bets sized one at a time.
+    """
+    returns, weights = _scenarios(p, net_odds, n_scenarios, random_state)
+    budget = min(budget, 1.0)
+
+    f = _project(np.maximum(p - (1 - p) / net_odds, 0), cap, budget)
+    while (1 + returns @ f).min() <= 0:
+        f /= 2
+    wealth = 1 + returns @ f
+    growth = weights @ np.log(wealth)
+    step = 1.0
+
+    for _ in range(max_iter):
+        gradient = returns.T @ (weights / wealth)
+        while True:
+            candidate = _project(f + step * gradient, cap, budget)
+            move = candidate - f
+            candidate_wealth = 1 + returns @ candidate
+            if (candidate_wealth > 0).all():
+                new_growth = weights @ np.log(candidate_wealth)
+                if new_growth >= growth + gradient @ move - move @ move / (2 * step):
+                    break
+            step /= 2
+        f, wealth, growth = candidate, candidate_wealth, new_growth
+        if np.abs(move).max() < tol:
+            break
+        step *= 2
+    return f
+
+def stake_fixtures(fixtures, probs, bankroll, **kwargs):
+    """
+    Batch helper: adds Pick/Stake/Edge columns to a fixtures DataFrame
+    (needs B365H/B365D/B365A) given the model probabilities for those rows.
+    """
+    odds = fixtures[ODDS_COLS].to_numpy(dtype=float)
+    probs = np.asarray(probs, dtype=float)
+    stakes, picks = kelly_stakes(probs, odds, bankroll, **kwargs)
+
+    rows = np.arange(len(fixtures))
+    safe = np.maximum(picks, 0)
+
+    result = fixtures.copy()
+    result['Pick'] = pd.Series(picks, index=fixtures.index).map({-1: None, 0: 'H', 1: 'D', 2: 'A'})
+    result['Stake'] = stakes
+    result['Edge'] = np.where(picks >= 0, probs[rows, safe] * odds[rows, safe] - 1, 0.0)
+    return result
+
+def kelly_single(probs, odds, bankroll, fraction=0.25, min_edge=0.05,
+                 max_stake=0.05, outcomes=KELLY_OUTCOMES):
+    """
+    Scalar version of kelly_stakes() for one fixture, without NumPy overhead
+    (with a single bet the joint optimum is the usual Kelly fraction).
+    Used on hot paths that re-size a single bet at a time (e.g. live odds).
+    Returns (stake, pick, edge); pick is -1 when there is no bet.
+    """
+    pick, best_edge = -1, min_edge
+    for i in outcomes:
+        o = odds[i]
+        if o is None or o <= 1:
+            continue
+        edge = probs[i] * o - 1
+        if edge > best_edge:
+            pick, best_edge = i, edge
+
+    if pick < 0:
+        return 0.0, -1, 0.0
+    kelly = best_edge / (odds[pick] - 1)
+    return min(fraction * kelly, max_stake) * bankroll, pick, best_edge
@@ -0,0 +1,127 @@
+import numpy as np
+
+def export_model(model, path=None, X_check=None):
+    """
+    Flattens a fitted HistGradientBoostingClassifier into plain NumPy arrays.
+    All trees are stored back to back; leaves point at themselves so every
+    tree can be walked for the same number of steps.
+    Saves an .npz if path is given. If X_check is given, the exported model is
+    compared to model.predict_proba on it and a mismatch raises ValueError.
+    """
+    n_classes = model.n_trees_per_iteration_
+    features, thresholds, missing_left, children, values, roots = [], [], [], [], [], []
+    offset = 0
+    max_depth = 0
+
+    for iteration in model._predictors:
+        for predictor in iteration:
+            nodes = predictor.nodes
+            if nodes['is_categorical'].any():
+                raise ValueError("Categorical splits are not supported by the exported model.")
+
+            node_ids = np.arange(len(nodes)) + offset
+            is_leaf = nodes['is_leaf'].astype(bool)
+            left = np.where(is_leaf, node_ids, nodes['left'].astype(np.int64) + offset)
+            right = np.where(is_leaf, node_ids, nodes['right'].astype(np.int64) + offset)
+
+            features.append(np.where(is_leaf, 0, nodes['feature_idx']))
+            thresholds.append(nodes['num_threshold'])
+            missing_left.append(nodes['missing_go_to_left'].astype(bool))
+            children.append(np.column_stack([left, right]))
+            values.append(np.where(is_leaf, nodes['value'], 0.0))
+            roots.append(offset)
+
+            max_depth = max(max_depth, int(nodes['depth'].max()))
+            offset += len(nodes)
+
+    arrays = {
+        'feature': np.concatenate(features).astype(np.int64),
+        'threshold': np.concatenate(thresholds).astype(np.float64),
+        'missing_left': np.concatenate(missing_left),
+        'children': np.concatenate(children).astype(np.int64),
+        'value': np.concatenate(values).astype(np.float64),
+        'roots': np.asarray(roots, dtype=np.int64),
+        'baseline': np.asarray(model._baseline_prediction, dtype=np.float64).ravel(),
+        'max_depth': np.int64(max_depth),
+        'n_classes': np.int64(n_classes),
+        'classes': np.asarray(model.classes_),
+        'feature_names': np.asarray(getattr(model, 'feature_names_in_', []), dtype=str),
+    }
+    compact = CompactModel(arrays)
+
+    if X_check is not None:
+        expected = model.predict_proba(X_check)
+        diff = np.abs(compact.predict_proba(np.asarray(X_check, dtype=np.float64)) - expected).max()
+        if diff > 1e-9:
+            raise ValueError(f"Exported model differs from sklearn by {diff:.2e}")
+
+    if path is not None:
+        np.savez(path, **arrays)
+        print(f"Compact model saved to {path}")
+    return compact
+
+def load_compact_model(path):
+    """Loads an .npz written by export_model()."""
+    with np.load(path, allow_pickle=False) as data:
+        return CompactModel({k: data[k] for k in data.files})
+
+class CompactModel:
+    """
+    Pure-NumPy evaluator for an exported HistGradientBoostingClassifier.
+    Takes plain float arrays in the training feature order (see feature_names).
+    """
+    def __init__(self, arrays):
+        self.feature = arrays['feature']
+        self.threshold = arrays['threshold']
+        self.missing_left = arrays['missing_left']
+        self.children = arrays['children']
+        self.value = arrays['value']
+        self.roots = arrays['roots']
+        self.baseline = arrays['baseline']
+        self.max_depth = int(arrays['max_depth'])
+        self.n_classes = int(arrays['n_classes'])
+        self.classes_ = arrays['classes']
+        self.feature_names = [str(f) for f in arrays['feature_names']]
+
+    def vector(self, values):
+        """Feature vector in training order from a {feature name: value} dict (missing -> NaN)."""
+        return np.array([np.nan if values.get(name) is None else values[name]
+                         for name in self.feature_names], dtype=np.float64)
+
+    def raw_predict(self, X):
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            return self._raw_predict_row(X)[None, :]
+
+        # Index into the flattened matrix: one gather per level for all rows and trees
+        flat = np.ascontiguousarray(X).ravel()
+        row_offsets = (np.arange(len(X)) * X.shape[1])[:, None]
+        node = np.broadcast_to(self.roots, (len(X), len(self.roots)))
+        for _ in range(self.max_depth):
+            x = flat[row_offsets + self.feature[node]]
+            go_right = ~((x <= self.threshold[node]) | (np.isnan(x) & self.missing_left[node]))
+            node = self.children[node, go_right.astype(np.intp)]
+
+        leaves = self.value[node].reshape(len(X), -1, self.n_classes)
+        return leaves.sum(axis=1) + self.baseline
+
+    def _raw_predict_row(self, x):
+        # Same walk as raw_predict without the row dimension (the hot path for one fixture)
+        node = self.roots
+        for _ in range(self.max_depth):
+            v = x[self.feature[node]]
+            go_right = ~((v <= self.threshold[node]) | (np.isnan(v) & self.missing_left[node]))
+            node = self.children[node, go_right.astype(np.intp)]
+        return self.value[node].reshape(-1, self.n_classes).sum(axis=0) + self.baseline
+
+    def predict_proba(self, X):
+        raw = self.raw_predict(X)
+        if self.n_classes == 1:
+            p = 1 / (1 + np.exp(-raw[:, 0]))
+            return np.column_stack([1 - p, p])
+        raw = raw - raw.max(axis=1, keepdims=True)
+        exp = np.exp(raw)
+        return exp / exp.sum(axis=1, keepdims=True)
+
+    def predict(self, X):
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
@@ -1,7 +1,9 @@
 import pandas as pd
-import requests
+from src import http_client
 import time
 import os
+import threading
+from collections import OrderedDict
 from datetime import datetime
 
 # Stadium Coordinates (Lat, Lon)
@@ -114,7 +116,7 @@ def fetch_weather_batch(matches_df):
         }
         
         try:
-            r = requests.get(url, params=params)
+            r = http_client.get(url, params=params, max_age=float('inf')) # Past weather never changes
             data = r.json()
             
             if 'daily' in data:
@@ -168,15 +170,23 @@ def fetch_weather_batch(matches_df):
         result = pd.merge(matches_df, cache_df[['key', 'Rain', 'Temperature', 'WindSpeed']], on='key', how='left').drop(columns=['key'])
         return result
 
-def fetch_forecast(team_name, date_str):
+# Forecast cache: (stadium coords, date) -> (fetched_at, forecast)
+FORECAST_TTL = 3 * 60 * 60      # seconds before a cached forecast is revalidated
+FORECAST_CACHE_SIZE = 1024      # max cached (stadium, date) entries, least recently used evicted first
+FORECAST_TIMEOUT = 5            # seconds per Open-Meteo request
+DEFAULT_FORECAST = {'Rain': 0.0, 'Temperature': 15.0, 'WindSpeed': 10.0}
+
+_forecast_cache = OrderedDict()
+_forecast_lock = threading.Lock()
+_refreshing = set()
+
+def _request_forecast(coords, start_date, end_date, retries=0):
     """
-    Fetches weather forecast for a specific team/date.
-    Returns dict with Rain, Temperature, WindSpeed.
+    One Open-Meteo forecast request for a stadium over a date range.
+    Returns {date_str: forecast}, or None if the request failed.
+    Not retried by default: a user is waiting, and a failure falls back to
+    DEFAULT_FORECAST (background prefetching passes retries=None).
     """
-    coords = get_coords(team_name)
-    if not coords:
-        return {'Rain': 0.0, 'Temperature': 15.0, 'WindSpeed': 10.0} # Default
-        
     lat, lon = coords
     
     # Use Forecast API
@@ -186,25 +196,102 @@ def fetch_forecast(team_name, date_str):
         "longitude": lon,
         "daily": "temperature_2m_max,precipitation_sum,wind_speed_10m_max",
         "timezone": "auto",
-        "start_date": date_str,
-        "end_date": date_str
+        "start_date": start_date,
+        "end_date": end_date
     }
     
     try:
-        r = requests.get(url, params=params)
+        r = http_client.get(url, params=params, max_age=FORECAST_TTL,
+                            timeout=FORECAST_TIMEOUT, retries=retries)
         data = r.json()
         
         if 'daily' in data:
             daily = data['daily']
             return {
-                'Rain': daily['precipitation_sum'][0],
-                'Temperature': daily['temperature_2m_max'][0],
-                'WindSpeed': daily['wind_speed_10m_max'][0]
+                day: {
+                    'Rain': daily['precipitation_sum'][i],
+                    'Temperature': daily['temperature_2m_max'][i],
+                    'WindSpeed': daily['wind_speed_10m_max'][i]
+                }
+                for i, day in enumerate(daily['time'])
             }
     except Exception as e:
         print(f"Error fetching forecast: {e}")
+    return None
+
+def _store_forecasts(coords, forecasts):
+    now = time.time()
+    with _forecast_lock:
+        for day, forecast in forecasts.items():
+            _forecast_cache[(coords, day)] = (now, forecast)
+            _forecast_cache.move_to_end((coords, day))
+        while len(_forecast_cache) > FORECAST_CACHE_SIZE:
+            _forecast_cache.popitem(last=False)
+
+def _revalidate(coords, date_str):
+    try:
+        forecasts = _request_forecast(coords, date_str, date_str)
+        if forecasts:
+            _store_forecasts(coords, forecasts)
+    finally:
+        with _forecast_lock:
+            _refreshing.discard((coords, date_str))
+
+def fetch_forecast(team_name, date_str, ttl=None):
+    """
+    Fetches weather forecast for a specific team/date.
+    Returns dict with Rain, Temperature, WindSpeed.
+    Served from the forecast cache when possible: fresh entries cost no request,
+    stale ones are returned straight away and refreshed in the background.
+    """
+    coords = get_coords(team_name)
+    if not coords:
+        return dict(DEFAULT_FORECAST) # Default
+    
+    ttl = FORECAST_TTL if ttl is None else ttl
+    key = (coords, date_str)
+    with _forecast_lock:
+        entry = _forecast_cache.get(key)
+        if entry is not None:
+            _forecast_cache.move_to_end(key)
+            fetched_at, forecast = entry
+            if time.time() - fetched_at > ttl and key not in _refreshing:
+                _refreshing.add(key)
+                threading.Thread(target=_revalidate, args=key, daemon=True).start()
+            return dict(forecast)
+    
+    forecasts = _request_forecast(coords, date_str, date_str)
+    if forecasts and date_str in forecasts:
+        _store_forecasts(coords, forecasts)
+        return dict(forecasts[date_str])
         
-    return {'Rain': 0.0, 'Temperature': 15.0, 'WindSpeed': 10.0} # Fallback
+    return dict(DEFAULT_FORECAST) # Fallback
+
+def prefetch_forecasts(fixtures, background=False):
+    """
+    Warms the forecast cache for upcoming fixtures, given as (home_team, date_str) pairs.
+    Makes one multi-day request per stadium covering all of its fixture dates.
+    With background=True runs in a daemon thread and returns it.
+    """
+    if background:
+        thread = threading.Thread(target=prefetch_forecasts, args=(list(fixtures),), daemon=True)
+        thread.start()
+        return thread
+    
+    dates_by_stadium = {}
+    for team, date_str in fixtures:
+        coords = get_coords(team)
+        if coords:
+            dates_by_stadium.setdefault(coords, []).append(date_str)
+    
+    fetched = 0
+    for coords, dates in dates_by_stadium.items():
+        forecasts = _request_forecast(coords, min(dates), max(dates), retries=None)
+        if forecasts:
+            _store_forecasts(coords, forecasts)
+            fetched += len(forecasts)
+    print(f"Prefetched {fetched} forecast days for {len(dates_by_stadium)} stadiums.")
+    return fetched
 
 if __name__ == "__main__":
     # Test
@@ -0,0 +1,58 @@
+import pandas as pd
+import numpy as np
+from src.staking import ODDS_COLS
+
+def odds_grid(home_odds, draw_odds, away_odds):
+    """Every combination of the given H/D/A prices, as a DataFrame of B365 columns."""
+    h, d, a = np.meshgrid(home_odds, draw_odds, away_odds, indexing='ij')
+    return pd.DataFrame({'B365H': h.ravel(), 'B365D': d.ravel(), 'B365A': a.ravel()})
+
+def margin_grid(probs, margins):
+    """
+    Bookmaker prices for the same H/D/A probabilities at each overround,
+    e.g. margins=np.linspace(0, 0.10, 11) for a fair book up to a 10% margin.
+    """
+    probs = np.asarray(probs, dtype=float)
+    margins = np.asarray(margins, dtype=float)
+    odds = 1 / (probs[None, :] * (1 + margins[:, None]))
+    grid = pd.DataFrame(odds, columns=ODDS_COLS)
+    grid['Margin'] = margins
+    return grid
+
+def market_shift_grid(home_odds, draw_odds=3.4, margin=0.05):
+    """
+    Prices along a market moving from the home side to the away side: for each
+    home price the away price is set so the book keeps the same margin.
+    """
+    home_odds = np.asarray(home_odds, dtype=float)
+    away_implied = (1 + margin) - 1 / home_odds - 1 / draw_odds
+    valid = away_implied > 0
+    return pd.DataFrame({
+        'B365H': home_odds[valid],
+        'B365D': draw_odds,
+        'B365A': 1 / away_implied[valid],
+    })
+
+def odds_sensitivity(model, match_features, odds):
+    """
+    Scores one fixture under many odds scenarios in a single batched predict_proba.
+    match_features: 1-row DataFrame with the model's feature columns (as used for
+    the normal prediction); odds: DataFrame with B365H/B365D/B365A per scenario
+    (see odds_grid, margin_grid, market_shift_grid).
+    Returns odds plus Prob_*, Edge_* (expected return per unit staked) and the book margin.
+    """
+    features = list(match_features.columns)
+    X = pd.DataFrame(np.repeat(match_features.to_numpy(dtype=float), len(odds), axis=0), columns=features)
+    for col in ODDS_COLS:
+        if col in features:
+            X[col] = odds[col].to_numpy(dtype=float)
+
+    probs = model.predict_proba(X)
+
+    surface = odds.reset_index(drop=True).copy()
+    prices = surface[ODDS_COLS].to_numpy(dtype=float)
+    for i, outcome in enumerate(['H', 'D', 'A']):
+        surface[f'Prob_{outcome}'] = probs[:, i]
+        surface[f'Edge_{outcome}'] = probs[:, i] * prices[:, i] - 1
+    surface['Book_Margin'] = (1 / prices).sum(axis=1) - 1
+    return surface
@@ -0,0 +1,83 @@
+import itertools
+
+import numpy as np
+import pandas as pd
+
+from src.h2h_index import H2H_FEATURES, add_h2h_features
+
+TEAMS = ['Arsenal', 'Burnley', 'Chelsea', 'Everton', 'Fulham', 'Luton']
+
+def _history(seasons=3, seed=0):
+    # Double round robins, one match per day so "earlier" is unambiguous
+    rng = np.random.default_rng(seed)
+    fixtures = list(itertools.permutations(TEAMS, 2)) * seasons
+    n = len(fixtures)
+    return pd.DataFrame({
+        'Date': pd.date_range('2023-08-01', periods=n, freq='D'),
+        'HomeTeam': [h for h, _ in fixtures],
+        'AwayTeam': [a for _, a in fixtures],
+        'FTHG': rng.poisson(1.5, n),
+        'FTAG': rng.poisson(1.1, n),
+    })
+
+def _expected(history, k=5, window=5):
+    # Brute force from the matches strictly before each one
+    rows = []
+    for i, match in history.iterrows():
+        before = history[history['Date'] < match['Date']]
+        home, away = match['HomeTeam'], match['AwayTeam']
+
+        pair = before[before['HomeTeam'].isin([home, away]) & before['AwayTeam'].isin([home, away])].tail(k)
+        scored = np.where(pair['HomeTeam'] == home, pair['FTHG'], pair['FTAG'])
+        conceded = np.where(pair['HomeTeam'] == home, pair['FTAG'], pair['FTHG'])
+        points = np.select([scored > conceded, scored == conceded], [3, 1], 0)
+        n = len(pair)
+        row = [n, points.mean() if n else 0.0, (scored - conceded).mean() if n else 0.0]
+
+        for team, venue, goals_for, goals_against in ((home, 'HomeTeam', 'FTHG', 'FTAG'), (away, 'AwayTeam', 'FTAG', 'FTHG')):
+            recent = before[before[venue] == team].tail(window)
+            if len(recent) < window:
+                row += [np.nan] * 3
+                continue
+            gf, ga = recent[goals_for], recent[goals_against]
+            row += [np.select([gf > ga, gf == ga], [3, 1], 0).sum(), gf.mean(), ga.mean()]
+        rows.append(row)
+    return pd.DataFrame(rows, columns=H2H_FEATURES, index=history.index)
+
+def test_each_match_sees_only_earlier_results():
+    history = _history()
+    # Input order does not matter, only dates do
+    shuffled = history.sample(frac=1, random_state=0)
+    out, _ = add_h2h_features(shuffled)
+
+    pd.testing.assert_frame_equal(out.loc[history.index, H2H_FEATURES], _expected(history),
+                                  check_dtype=False)
+
+def test_future_results_do_not_change_earlier_rows():
+    history = _history()
+    changed = history.copy()
+    cut = len(history) // 2
+    changed.loc[cut:, ['FTHG', 'FTAG']] = changed.loc[cut:, ['FTAG', 'FTHG']].to_numpy() + 3
+
+    before, _ = add_h2h_features(history)
+    after, _ = add_h2h_features(changed)
+    # Row `cut` itself only sees earlier results, so it is unchanged too
+    pd.testing.assert_frame_equal(before.loc[:cut, H2H_FEATURES], after.loc[:cut, H2H_FEATURES])
+    assert not before.loc[cut + 1:, H2H_FEATURES].equals(after.loc[cut + 1:, H2H_FEATURES])
+
+def test_continuing_an_index_matches_a_full_build():
+    history = _history()
+    full, _ = add_h2h_features(history)
+
+    for k in (1, 37, len(history) - 1):
+        first, index = add_h2h_features(history.iloc[:k])
+        rest, index = add_h2h_features(history.iloc[k:], index=index)
+        pd.testing.assert_frame_equal(pd.concat([first, rest]), full)
+
+def test_filtered_rows_keep_full_history():
+    history = _history()
+    # e.g. calculate_features dropping matches without a full form window
+    subset = history.iloc[40::3]
+    out, _ = add_h2h_features(subset, history=history)
+
+    pd.testing.assert_frame_equal(out[H2H_FEATURES], _expected(history).loc[subset.index], check_dtype=False)
@@ -0,0 +1,75 @@
+import datetime
+import itertools
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.features import calculate_features
+from src.history_store import (current_season_year, import_csv, iter_shards, load_manifest, parse_dates,
+                               season_codes, season_start_year, stream_features)
+
+TEAMS = ['Arsenal', 'Burnley', 'Chelsea', 'Derby', 'Everton', 'Fulham']
+
+def _history(seasons=('2324', '2425', '2526'), xg=False, seed=0):
+    # Double round robin per season, one round a week, with dd/mm/yyyy dates like football-data
+    rng = np.random.default_rng(seed)
+    pairs = list(itertools.permutations(TEAMS, 2))
+    rows = []
+    for season in seasons:
+        start = pd.Timestamp(season_start_year(season), 8, 12)
+        order = rng.permutation(len(pairs))
+        for i, k in enumerate(order):
+            home, away = pairs[k]
+            hg, ag = rng.poisson(1.5), rng.poisson(1.1)
+            row = {'Date': (start + pd.Timedelta(days=i)).strftime('%d/%m/%Y'), 'HomeTeam': home,
+                   'AwayTeam': away, 'FTHG': hg, 'FTAG': ag,
+                   'FTR': 'H' if hg > ag else 'A' if ag > hg else 'D', 'Season': season}
+            if xg:
+                row.update({'Home_xG': rng.uniform(0.3, 2.5), 'Away_xG': rng.uniform(0.3, 2.5)})
+            rows.append(row)
+    return pd.DataFrame(rows)
+
+def test_current_season():
+    assert current_season_year(datetime.date(2026, 10, 19)) == 2026
+    assert current_season_year(datetime.date(2027, 3, 1)) == 2026
+    assert current_season_year(datetime.date(2026, 6, 30)) == 2025
+    assert current_season_year(datetime.date(2026, 7, 1)) == 2026
+
+def test_season_codes():
+    assert season_codes(1998, 2001) == ['9899', '9900', '0001', '0102']
+    codes = season_codes()
+    assert codes[0] == '9394' and season_start_year(codes[-1]) == current_season_year()
+    assert [season_start_year(c) for c in codes] == list(range(1993, current_season_year() + 1))
+
+def test_import_csv_shards_by_season(tmp_path):
+    history = _history()
+    path = tmp_path / 'history.csv'
+    history.to_csv(path, index=False)
+    manifest = import_csv(str(path), 'E0', root=str(tmp_path / 'store'))
+
+    assert manifest == load_manifest(str(tmp_path / 'store'))
+    assert sorted(manifest['E0']) == ['2324', '2425', '2526']
+    assert manifest['E0']['2425']['rows'] == 30
+    assert manifest['E0']['2425']['first_date'] == '2024-08-12'
+    assert [season for season, _ in iter_shards('E0', str(tmp_path / 'store'))] == ['2324', '2425', '2526']
+
+@pytest.mark.parametrize('xg', [False, True], ids=['form', 'xg'])
+def test_stream_features_match_calculate_features(tmp_path, xg):
+    history = _history(xg=xg)
+    path = tmp_path / 'history.csv'
+    history.to_csv(path, index=False)
+    import_csv(str(path), 'E0', root=str(tmp_path / 'store'))
+
+    streamed = pd.concat([features for _, features in stream_features('E0', root=str(tmp_path / 'store'))])
+    # calculate_features reads ISO dates, as in data/merged_*.csv
+    expected = calculate_features(history.assign(Date=parse_dates(history['Date'])))
+
+    form = [c for c in expected.columns if '_Form_' in c]
+    assert len(form) == (14 if xg else 6)
+    key = ['Date', 'HomeTeam', 'AwayTeam']
+    streamed = streamed[key + form].sort_values(key).reset_index(drop=True)
+    expected = expected[key + form].sort_values(key).reset_index(drop=True)
+    # Form carries over season boundaries, so only the first season loses matches
+    assert (expected['Date'] >= '2024-07-01').sum() == 60
+    pd.testing.assert_frame_equal(streamed, expected, check_dtype=False)
@@ -0,0 +1,104 @@
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from src.http_client import HttpClient, OfflineError
+
+class _Handler(BaseHTTPRequestHandler):
+    body = b'Date,HomeTeam\n2024-05-19,Arsenal\n'
+    etag = '"v1"'
+    requests = []
+
+    def do_GET(self):
+        type(self).requests.append((self.path, self.headers.get('If-None-Match')))
+        if self.headers.get('If-None-Match') == self.etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('ETag', self.etag)
+        self.send_header('Content-Length', str(len(self.body)))
+        self.end_headers()
+        self.wfile.write(self.body)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def server():
+    _Handler.requests = []
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{httpd.server_address[1]}'
+    httpd.shutdown()
+    httpd.server_close()
+
+def _client(tmp_path, **kwargs):
+    return HttpClient(cache_dir=str(tmp_path), rate_limits={}, **kwargs)
+
+def test_fresh_cache_skips_network(server, tmp_path):
+    client = _client(tmp_path, offline=False)
+    first = client.get(f'{server}/E0.csv', max_age=60)
+    second = client.get(f'{server}/E0.csv', max_age=60)
+    assert first.content == second.content == _Handler.body
+    assert not first.from_cache and second.from_cache
+    assert client.network_calls == 1 and len(_Handler.requests) == 1
+
+def test_stale_cache_revalidates_with_etag(server, tmp_path):
+    client = _client(tmp_path, offline=False)
+    client.get(f'{server}/E0.csv', max_age=60)
+    response = client.get(f'{server}/E0.csv', max_age=0)
+    # The server answered 304, so the cached body is served
+    assert _Handler.requests[-1] == ('/E0.csv', '"v1"')
+    assert response.from_cache and response.content == _Handler.body
+    assert client.network_calls == 2
+
+def test_params_are_part_of_the_cache_key(server, tmp_path):
+    client = _client(tmp_path, offline=False)
+    client.get(f'{server}/forecast', params={'lat': 1}, max_age=60)
+    client.get(f'{server}/forecast', params={'lat': 2}, max_age=60)
+    client.get(f'{server}/forecast', params={'lat': 1}, max_age=60)
+    assert client.network_calls == 2
+
+def test_offline_replays_recorded_responses(server, tmp_path):
+    _client(tmp_path, offline=False).get(f'{server}/E0.csv', max_age=60)
+    served = len(_Handler.requests)
+
+    offline = _client(tmp_path, offline=True)
+    # Even a response older than max_age is replayed without a request
+    response = offline.get(f'{server}/E0.csv', max_age=0)
+    assert response.content == _Handler.body and response.from_cache
+    assert offline.network_calls == 0 and len(_Handler.requests) == served
+
+def test_offline_without_recording_raises(tmp_path):
+    with pytest.raises(OfflineError):
+        _client(tmp_path, offline=True).get('http://127.0.0.1:9/never-recorded.csv')
+
+def test_offline_from_environment(tmp_path, monkeypatch):
+    monkeypatch.setenv('FOOTBALL_HTTP_OFFLINE', '1')
+    assert _client(tmp_path).offline
+
+def _closed_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+def test_no_retries_fails_fast(tmp_path):
+    client = _client(tmp_path, offline=False, retries=3, backoff=0.2)
+    url = f'http://127.0.0.1:{_closed_port()}/forecast'
+
+    start = time.time()
+    with pytest.raises(requests.ConnectionError):
+        client.get(url, timeout=1, retries=0)
+    assert time.time() - start < 0.5
+
+    # The client default still retries with backoff
+    start = time.time()
+    with pytest.raises(requests.ConnectionError):
+        client.get(url, timeout=1)
+    assert time.time() - start >= 0.2
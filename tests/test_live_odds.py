@@ -0,0 +1,127 @@
+import json
+import socket
+import threading
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import HistGradientBoostingClassifier
+
+from src.live_odds import LiveValueScanner, tail_jsonl, socket_feed
+from src.tree_export import export_model
+
+def _scanner(**kwargs):
+    alerts = []
+    scanner = LiveValueScanner(bankroll=1000, on_alert=alerts.append, **kwargs)
+    return scanner, alerts
+
+def test_alert_when_fixture_becomes_value_switches_and_goes():
+    scanner, alerts = _scanner()
+    scanner.add_fixture('F1', [0.5, 0.3, 0.2], odds=[1.8, 3.2, 4.5])
+    assert alerts == []
+
+    # 0.5 * 2.3 - 1 = 15% edge on the home side
+    scanner.update({'fixture': 'F1', 'B365H': 2.3})
+    assert alerts[-1]['pick'] == 'H' and alerts[-1]['stake'] > 0
+
+    # Same pick, new price: re-sized but no new alert
+    scanner.update({'fixture': 'F1', 'B365H': 2.4})
+    assert len(alerts) == 1
+    assert scanner.fixtures['F1']['stake'] > alerts[-1]['stake']
+
+    # Away becomes the bigger edge
+    scanner.update({'fixture': 'F1', 'B365H': 1.8, 'B365A': 6.0})
+    assert alerts[-1]['pick'] == 'A' and len(alerts) == 2
+
+    scanner.update({'fixture': 'F1', 'B365A': 4.0})
+    assert alerts[-1]['pick'] is None and len(alerts) == 3
+    assert scanner.fixtures['F1']['stake'] == 0.0
+
+def test_unchanged_price_is_ignored():
+    scanner, alerts = _scanner()
+    scanner.add_fixture('F1', [0.5, 0.3, 0.2], odds=[2.3, 3.2, 4.5])
+    assert scanner.update({'fixture': 'F1', 'B365H': 2.3}) is None
+
+def _compact_model():
+    rng = np.random.default_rng(0)
+    n = 2000
+    X = pd.DataFrame({
+        'Home_Form_Points': rng.integers(0, 16, n).astype(float),
+        'Away_Form_Points': rng.integers(0, 16, n).astype(float),
+        'B365H': rng.uniform(1.2, 8, n),
+        'B365D': rng.uniform(2.8, 4.5, n),
+        'B365A': rng.uniform(1.2, 8, n),
+    })
+    # Outcome follows the prices, so the model's probabilities move with the odds
+    p_home = (1 / X['B365H']) / (1 / X['B365H'] + 1 / X['B365D'] + 1 / X['B365A'])
+    y = np.where(rng.random(n) < p_home, 0, rng.integers(1, 3, n))
+    model = HistGradientBoostingClassifier(max_iter=40, random_state=0).fit(X, y)
+    return export_model(model)
+
+TEAMS = {'Home FC': {'Form_Points': 12.0}, 'Away FC': {'Form_Points': 4.0}, 'New FC': {'Form_Points': None}}
+
+def test_rescore_reevaluates_model_on_price_change():
+    model = _compact_model()
+    scanner, _ = _scanner(model=model, teams=TEAMS, rescore=True)
+    scanner.update({'fixture': 'F1', 'home': 'Home FC', 'away': 'Away FC', 'B365H': 1.5, 'B365D': 4.0, 'B365A': 7.0})
+    before = scanner.fixtures['F1']['probs']
+
+    scanner.update({'fixture': 'F1', 'B365H': 6.0, 'B365A': 1.5})
+    after = scanner.fixtures['F1']['probs']
+    expected = model.predict_proba(model.vector({'Home_Form_Points': 12.0, 'Away_Form_Points': 4.0,
+                                                 'B365H': 6.0, 'B365D': 4.0, 'B365A': 1.5}))[0]
+    np.testing.assert_allclose(after, expected)
+    assert after[0] < before[0]
+
+def test_cached_probs_without_rescore():
+    scanner, _ = _scanner(model=_compact_model(), teams=TEAMS)
+    scanner.update({'fixture': 'F1', 'home': 'Home FC', 'away': 'Away FC', 'B365H': 1.5, 'B365D': 4.0, 'B365A': 7.0})
+    before = list(scanner.fixtures['F1']['probs'])
+    scanner.update({'fixture': 'F1', 'B365H': 6.0, 'B365A': 1.5})
+    assert scanner.fixtures['F1']['probs'] == before
+
+def test_no_fixture_for_team_without_form():
+    scanner, alerts = _scanner(model=_compact_model(), teams=TEAMS)
+    assert not scanner.add_fixture_from_form('F2', 'New FC', 'Away FC', [1.5, 4.0, 7.0])
+    assert scanner.update({'fixture': 'F2', 'home': 'New FC', 'away': 'Away FC',
+                           'B365H': 9.0, 'B365D': 4.0, 'B365A': 1.2}) is None
+    assert 'F2' not in scanner.fixtures and alerts == []
+
+MESSAGES = [{'fixture': 'F1', 'B365H': 2.1}, {'fixture': 'F1', 'B365A': 3.9}]
+
+def test_bad_messages_are_skipped(capsys):
+    scanner, alerts = _scanner()
+    scanner.add_fixture('F1', [0.5, 0.3, 0.2], odds=[1.8, 3.2, 4.5])
+    # A non-numeric price rejects the whole message, leaving earlier prices untouched
+    scanner.run([{'fixture': 'F1', 'B365H': 2.3, 'B365A': 'suspended'}, ['F1', 2.3], 'F1',
+                 {'fixture': 'F1', 'B365H': 2.3}])
+    assert scanner.updates == 4
+    assert [a['pick'] for a in alerts] == ['H']
+    assert scanner.fixtures['F1']['odds'] == [2.3, 3.2, 4.5]
+    assert capsys.readouterr().err.count('Skipping price message') == 3
+
+def test_tail_jsonl_reads_complete_lines(tmp_path):
+    path = tmp_path / 'feed.jsonl'
+    path.write_text(json.dumps(MESSAGES[0]) + '\n\n' + json.dumps(MESSAGES[1]) + '\n' + '{"fixture": "F')
+    # The last line is still being written, so it is not yielded
+    assert list(tail_jsonl(str(path), follow=False)) == MESSAGES
+
+def test_feeds_skip_malformed_lines(tmp_path, capsys):
+    path = tmp_path / 'feed.jsonl'
+    path.write_text(json.dumps(MESSAGES[0]) + '\n{"fixture": "F1", B365H: 2.2}\n' + json.dumps(MESSAGES[1]) + '\n')
+    assert list(tail_jsonl(str(path), follow=False)) == MESSAGES
+    assert 'Skipping malformed feed line' in capsys.readouterr().err
+
+def test_socket_feed():
+    server = socket.create_server(('127.0.0.1', 0))
+    port = server.getsockname()[1]
+
+    def serve():
+        conn, _ = server.accept()
+        with conn:
+            conn.sendall((json.dumps(MESSAGES[0]) + '\nnot json\n' + json.dumps(MESSAGES[1]) + '\n').encode())
+        server.close()
+
+    thread = threading.Thread(target=serve)
+    thread.start()
+    assert list(socket_feed('127.0.0.1', port)) == MESSAGES
+    thread.join()
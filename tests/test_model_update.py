@@ -0,0 +1,109 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import HistGradientBoostingClassifier
+from sklearn.metrics import log_loss
+
+from src.model import BASE_FEATURES, add_iterations, load_update_state, train_model, update_model
+from src.publish import read_pointer
+from src.tree_export import export_model
+
+def _matches(n, seed, scale=1.0):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(n, 5)) * scale
+    logits = np.column_stack([X[:, 0] + 0.5 * X[:, 1], 0.2 * X[:, 2], -X[:, 0] + 0.3 * X[:, 3]])
+    p = np.exp(logits) / np.exp(logits).sum(axis=1, keepdims=True)
+    y = (rng.random(n)[:, None] > p.cumsum(axis=1)).sum(axis=1)
+    return pd.DataFrame(X, columns=[f'f{i}' for i in range(5)]), y
+
+def _fit(X, y):
+    return HistGradientBoostingClassifier(max_iter=100, learning_rate=0.1, max_depth=5, random_state=42).fit(X, y)
+
+def test_update_moves_predictions_less_than_a_full_refit():
+    X_old, y_old = _matches(1500, 0)
+    X_new, y_new = _matches(300, 1)
+    X_eval, _ = _matches(1000, 2)
+    model = _fit(X_old, y_old)
+    before = model.predict_proba(X_eval)
+
+    updated = add_iterations(model, X_new, y_new)
+    refit = _fit(pd.concat([X_old, X_new]), np.r_[y_old, y_new])
+
+    moved = np.abs(updated.predict_proba(X_eval) - before).mean()
+    assert 0 < moved < np.abs(refit.predict_proba(X_eval) - before).mean()
+    assert updated.n_iter_ == model.n_iter_ + 10
+    # The original model is left untouched
+    np.testing.assert_array_equal(model.predict_proba(X_eval), before)
+
+def test_update_improves_a_differently_binned_window():
+    # A window with a much narrower range than the training data gets very
+    # different bins; the added trees must still improve the model on it
+    model = _fit(*_matches(1500, 0))
+    for seed in range(3):
+        X_new, y_new = _matches(300, seed + 5, scale=0.3)
+        updated = add_iterations(model, X_new, y_new, learning_rate=0.05)
+        assert log_loss(y_new, updated.predict_proba(X_new)) < log_loss(y_new, model.predict_proba(X_new))
+
+def test_updated_model_exports():
+    X_new, y_new = _matches(300, 1)
+    updated = add_iterations(_fit(*_matches(1500, 0)), X_new, y_new)
+    compact = export_model(updated, X_check=X_new)
+    np.testing.assert_allclose(compact.predict_proba(X_new.to_numpy()), updated.predict_proba(X_new), atol=1e-9)
+
+def _league(weeks, seed=0, start='2020-08-15'):
+    # Ten matches every Saturday, with the columns train_model needs
+    n = weeks * 10
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame(rng.uniform(0, 3, (n, len(BASE_FEATURES))), columns=BASE_FEATURES)
+    df[['B365H', 'B365D', 'B365A']] = rng.uniform(1.5, 5, (n, 3))
+    strength = df['Home_Form_Points'] - df['Away_Form_Points'] + rng.normal(0, 1, n)
+    df['Result'] = np.where(strength > 0.7, 0, np.where(strength < -0.7, 2, 1))
+    df['Date'] = (pd.Timestamp(start) + pd.to_timedelta(np.arange(n) // 10 * 7, unit='D')).strftime('%Y-%m-%d')
+    return df
+
+@pytest.fixture
+def league(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    return _league(60)
+
+def test_first_update_is_a_full_retrain(league):
+    update_model(league)
+    model, state = load_update_state()
+    assert state['updates_since_full'] == 0
+    # train_model fits on the first 80% of the matches: 48 weeks
+    assert state['fitted_until'] == str((pd.Timestamp('2020-08-15') + pd.Timedelta(weeks=47)).date())
+    assert model.n_iter_ > 0
+
+def test_accepted_update_fits_the_new_matches(league):
+    update_model(league)
+    model, _ = load_update_state()
+
+    updated = update_model(league, tolerance=1.0, drift_tolerance=1.0)
+    assert updated.n_iter_ == model.n_iter_ + 10
+    _, state = load_update_state()
+    assert state['fitted_until'] == str(pd.to_datetime(league['Date']).max().date())
+    assert state['updates_since_full'] == 1
+
+    version = read_pointer('model_E0')['version']
+    assert update_model(league) is not None
+    assert read_pointer('model_E0')['version'] == version  # nothing new to fit
+
+def test_rejected_update_keeps_the_model_and_state(league):
+    update_model(league)
+    pointer = read_pointer('model_E0')
+    _, state = load_update_state()
+
+    update_model(league, tolerance=-1.0, drift_tolerance=1.0)
+    assert read_pointer('model_E0')['version'] == pointer['version']
+    assert load_update_state()[1] == state
+
+def test_retrain_outside_update_model_resets_the_state(league):
+    update_model(league)
+    update_model(league, tolerance=1.0, drift_tolerance=1.0)
+    assert load_update_state()[1]['updates_since_full'] == 1
+
+    # e.g. the pipeline's train stage or the app's retrain job
+    train_model(league.iloc[:300])
+    _, state = load_update_state()
+    assert state['updates_since_full'] == 0
+    assert state['fitted_until'] == str((pd.Timestamp('2020-08-15') + pd.Timedelta(weeks=23)).date())
@@ -0,0 +1,81 @@
+import json
+import os
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import HistGradientBoostingClassifier
+
+from src.pair_matrix import PairMatrix, DEFAULT_ODDS, build_pair_matrix, missing_features, score_fixtures
+from src.tree_export import export_model
+
+TEAMS = {
+    'Arsenal': {'Form_Points': 13.0, 'Form_GS': 2.2},
+    'Burnley': {'Form_Points': 2.0, 'Form_GS': 0.6},
+    'Chelsea': {'Form_Points': 8.0, 'Form_GS': 1.4},
+    'Promoted': {'Form_Points': None, 'Form_GS': None},
+}
+
+def _model(extra=(), path=None):
+    rng = np.random.default_rng(0)
+    n = 1500
+    columns = ['Home_Form_Points', 'Home_Form_GS', 'Away_Form_Points', 'Away_Form_GS',
+               'B365H', 'B365D', 'B365A', *extra]
+    X = pd.DataFrame(rng.uniform(0, 15, (n, len(columns))), columns=columns)
+    y = np.where(X['Home_Form_Points'] > X['Away_Form_Points'] + rng.normal(0, 4, n), 0, rng.integers(1, 3, n))
+    return export_model(HistGradientBoostingClassifier(max_iter=30, random_state=0).fit(X, y), path)
+
+def test_matrix_matches_single_fixture_scoring():
+    model = _model()
+    arrays = build_pair_matrix(model, TEAMS)
+    arrays['fingerprint'] = np.asarray('test')
+    matrix = PairMatrix(arrays)
+
+    for home in ('Arsenal', 'Burnley', 'Chelsea'):
+        for away in ('Arsenal', 'Burnley', 'Chelsea'):
+            if home == away:
+                assert matrix.lookup(home, away) is None
+                continue
+            values = dict(DEFAULT_ODDS)
+            values.update({f'Home_{k}': v for k, v in TEAMS[home].items()})
+            values.update({f'Away_{k}': v for k, v in TEAMS[away].items()})
+            np.testing.assert_allclose(matrix.lookup(home, away), model.predict_proba(model.vector(values))[0])
+
+    # No full form window, unknown team
+    assert matrix.lookup('Promoted', 'Arsenal') is None
+    assert matrix.lookup('Arsenal', 'Promoted') is None
+    assert matrix.lookup('Arsenal', 'Nobody') is None
+
+def test_features_row():
+    arrays = build_pair_matrix(_model(), TEAMS)
+    arrays['fingerprint'] = np.asarray('test')
+    row = PairMatrix(arrays).features('Arsenal', 'Burnley')
+    assert row['Home_Form_Points'].iloc[0] == 13.0 and row['Away_Form_GS'].iloc[0] == 0.6
+    assert row['B365H'].iloc[0] == DEFAULT_ODDS['B365H']
+
+def test_refuses_features_the_snapshot_cannot_supply():
+    model = _model(extra=('H2H_Matches', 'Home_Rain'))
+    assert missing_features(model.feature_names, {'Form_Points', 'Form_GS'}) == ['H2H_Matches', 'Home_Rain']
+    with pytest.raises(ValueError, match='H2H_Matches'):
+        build_pair_matrix(model, TEAMS)
+
+def test_score_fixtures_matches_matrix(tmp_path, monkeypatch):
+    # Plain files from an older run: no published snapshot
+    monkeypatch.chdir(tmp_path)
+    os.makedirs('models')
+    os.makedirs('data')
+    model = _model(path='models/model_E0.npz')
+    with open('data/team_form_E0.json', 'w') as f:
+        json.dump({'window': 5, 'teams': TEAMS}, f)
+
+    arrays = build_pair_matrix(model, TEAMS)
+    arrays['fingerprint'] = np.asarray('test')
+    matrix = PairMatrix(arrays)
+
+    fixtures = pd.DataFrame({'HomeTeam': ['Arsenal', 'Chelsea', 'Promoted', 'Nobody'],
+                             'AwayTeam': ['Burnley', 'Arsenal', 'Arsenal', 'Arsenal'],
+                             **{col: [odds] * 4 for col, odds in DEFAULT_ODDS.items()}})
+    probs = score_fixtures(fixtures)
+    np.testing.assert_allclose(probs[0], matrix.lookup('Arsenal', 'Burnley'))
+    np.testing.assert_allclose(probs[1], matrix.lookup('Chelsea', 'Arsenal'))
+    # No full form window, unknown team
+    assert np.isnan(probs[2:]).all()
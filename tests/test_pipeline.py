@@ -0,0 +1,71 @@
+import sys
+
+from src.pipeline import Pipeline
+
+def _pipeline(tmp_path, calls):
+    out = tmp_path / 'model.txt'
+    source = tmp_path / 'source.csv'
+
+    def load(path):
+        calls.append('load')
+        return source.read_text()
+
+    def train(data):
+        calls.append('train')
+        out.write_text(data.upper())
+        return len(data)
+
+    pipeline = Pipeline(cache_dir=str(tmp_path / 'cache'))
+    pipeline.stage('load', load, params={'path': str(source)}, inputs=[str(source)])
+    pipeline.stage('train', train, deps=['load'], outputs=[str(out)])
+    return pipeline, source, out
+
+def test_unchanged_run_is_cached(tmp_path):
+    calls = []
+    pipeline, source, _ = _pipeline(tmp_path, calls)
+    source.write_text('a,b\n')
+    assert pipeline.run() == {'load': 'ran', 'train': 'ran'}
+
+    pipeline, _, _ = _pipeline(tmp_path, calls)
+    assert pipeline.run() == {'load': 'cached', 'train': 'cached'}
+    assert calls == ['load', 'train']
+    assert pipeline.load('train') == 4
+
+def test_changed_input_reruns_downstream(tmp_path):
+    calls = []
+    pipeline, source, _ = _pipeline(tmp_path, calls)
+    source.write_text('a,b\n')
+    pipeline.run()
+
+    source.write_text('a,b,c\n')
+    pipeline, _, _ = _pipeline(tmp_path, calls)
+    assert pipeline.run() == {'load': 'ran', 'train': 'ran'}
+
+def test_output_replaced_outside_pipeline_reruns(tmp_path):
+    calls = []
+    pipeline, source, out = _pipeline(tmp_path, calls)
+    source.write_text('a,b\n')
+    pipeline.run()
+
+    out.write_text('retrained elsewhere')
+    pipeline, _, _ = _pipeline(tmp_path, calls)
+    assert pipeline.run() == {'load': 'cached', 'train': 'ran'}
+    assert out.read_text() == 'A,B\n'
+
+def test_module_names_key_stages_without_importing(tmp_path, monkeypatch):
+    module = tmp_path / 'stage_code.py'
+    module.write_text('VERSION = 1\n')
+    monkeypatch.syspath_prepend(str(tmp_path))
+    calls = []
+
+    def build():
+        pipeline = Pipeline(cache_dir=str(tmp_path / 'cache'))
+        pipeline.stage('train', lambda: calls.append('train'), code=['stage_code'])
+        return pipeline
+
+    assert build().run() == {'train': 'ran'}
+    assert build().run() == {'train': 'cached'}
+    assert 'stage_code' not in sys.modules
+
+    module.write_text('VERSION = 2\n')
+    assert build().run() == {'train': 'ran'}
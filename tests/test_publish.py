@@ -0,0 +1,88 @@
+import os
+import threading
+
+from src.publish import SnapshotReader, current_path, publish, read_pointer
+
+def _text(value):
+    def write(path):
+        with open(path, 'w') as f:
+            f.write(value)
+    return write
+
+def _read(path):
+    with open(path) as f:
+        return f.read()
+
+def test_publish_switches_the_pointer(tmp_path):
+    root = str(tmp_path)
+    assert read_pointer('model', root) is None and current_path('model', 'a.txt', root) is None
+
+    first = publish('model', {'a.txt': _text('one')}, root=root)
+    assert _read(current_path('model', 'a.txt', root)) == 'one'
+    second = publish('model', {'a.txt': _text('two')}, root=root)
+    assert read_pointer('model', root)['version'] == second['version'] != first['version']
+    assert _read(current_path('model', 'a.txt', root)) == 'two'
+    assert first['files']['a.txt'] != second['files']['a.txt']
+
+def test_reader_reloads_only_changed_files(tmp_path):
+    root = str(tmp_path)
+    loads = []
+
+    def loader(path):
+        loads.append(os.path.basename(path))
+        return _read(path)
+
+    publish('data', {'a.txt': _text('a1'), 'b.txt': _text('b1')}, root=root)
+    reader = SnapshotReader('data', root)
+    assert reader.get('a.txt', loader) == 'a1' and reader.get('b.txt', loader) == 'b1'
+    assert reader.get('a.txt', loader) == 'a1'
+    assert loads == ['a.txt', 'b.txt']
+
+    publish('data', {'a.txt': _text('a2'), 'b.txt': _text('b1')}, root=root)
+    assert reader.get('a.txt', loader) == 'a2' and reader.get('b.txt', loader) == 'b1'
+    assert loads == ['a.txt', 'b.txt', 'a.txt']
+    assert reader.get('missing.txt', loader) is None
+
+def test_reader_serves_the_old_version_during_a_reload(tmp_path):
+    root = str(tmp_path)
+    publish('model', {'a.txt': _text('old')}, root=root)
+    reader = SnapshotReader('model', root)
+    assert reader.get('a.txt', _read) == 'old'
+
+    publish('model', {'a.txt': _text('new')}, root=root)
+    started, release = threading.Event(), threading.Event()
+
+    def slow_loader(path):
+        started.set()
+        release.wait(5)
+        return _read(path)
+
+    result = {}
+    loading = threading.Thread(target=lambda: result.setdefault('value', reader.get('a.txt', slow_loader)))
+    loading.start()
+    assert started.wait(5)
+    # Another caller does not wait for the reload
+    assert reader.get('a.txt', _read) == 'old'
+    release.set()
+    loading.join(5)
+    assert result['value'] == 'new'
+    assert reader.get('a.txt', _read) == 'new'
+
+def test_prune_keeps_the_newest_versions(tmp_path):
+    root = str(tmp_path)
+    versions = [publish('model', {'a.txt': _text(str(i))}, keep=2, root=root)['version'] for i in range(6)]
+    assert sorted(os.listdir(tmp_path / 'model')) == sorted(['CURRENT.json'] + versions[-3:])
+    assert _read(current_path('model', 'a.txt', root)) == '5'
+
+def test_legacy_paths_are_replaced(tmp_path):
+    root = str(tmp_path / 'snapshots')
+    legacy = tmp_path / 'models' / 'model.txt'
+    publish('model', {'a.txt': _text('one')}, legacy={'a.txt': str(legacy)}, root=root)
+    assert legacy.read_text() == 'one'
+
+    with open(legacy) as held:
+        publish('model', {'a.txt': _text('two')}, legacy={'a.txt': str(legacy)}, root=root)
+        # Replaced, not rewritten: an open reader still sees the whole old file
+        assert held.read() == 'one'
+    assert legacy.read_text() == 'two'
+    assert os.listdir(legacy.parent) == ['model.txt']
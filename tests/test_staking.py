@@ -0,0 +1,102 @@
+import itertools
+
+import numpy as np
+import pandas as pd
+
+from src.model import evaluate_betting_strategy
+from src.staking import ODDS_COLS, kelly_single, kelly_stakes, stake_fixtures
+
+def _growth(stakes, probs, odds):
+    # Exact expected log growth of independent bets (stakes as bankroll fractions)
+    total = 0.0
+    for won in itertools.product([True, False], repeat=len(stakes)):
+        won = np.array(won)
+        weight = np.where(won, probs, 1 - probs).prod()
+        total += weight * np.log1p((stakes * np.where(won, odds - 1, -1)).sum())
+    return total
+
+def test_single_bet_is_fractional_kelly():
+    probs, odds = [[0.55, 0.25, 0.20]], [[2.1, 3.5, 4.0]]
+    stakes, picks = kelly_stakes(probs, odds, 1000, fraction=0.25, max_stake=1.0)
+    kelly = (0.55 * 2.1 - 1) / (2.1 - 1)
+    assert picks[0] == 0
+    np.testing.assert_allclose(stakes[0], 0.25 * kelly * 1000, rtol=1e-6)
+    np.testing.assert_allclose(kelly_single(probs[0], odds[0], 1000, max_stake=1.0)[0], stakes[0], rtol=1e-6)
+
+def test_simultaneous_bets_maximize_joint_log_growth():
+    probs = np.array([[0.60, 0.20, 0.20], [0.20, 0.20, 0.60], [0.50, 0.30, 0.20]])
+    odds = np.array([[2.0, 3.5, 4.0], [4.0, 3.5, 2.0], [2.4, 3.2, 3.5]])
+    stakes, picks = kelly_stakes(probs, odds, 1, fraction=1.0, max_stake=1.0, max_exposure=1.0)
+    assert list(picks) == [0, 2, 0]
+
+    # Sized one at a time they would stake more in total
+    alone = [kelly_single(p, o, 1, fraction=1.0, max_stake=1.0)[0] for p, o in zip(probs, odds)]
+    assert stakes.sum() < sum(alone)
+
+    p, o = probs[[0, 1, 2], picks], odds[[0, 1, 2], picks]
+    best = _growth(stakes, p, o)
+    assert best > _growth(np.array(alone), p, o)
+    for _ in range(200):
+        nudged = np.clip(stakes + np.random.default_rng(_).normal(0, 0.01, 3), 0, None)
+        assert _growth(nudged, p, o) <= best + 1e-12
+
+def test_per_bet_cap():
+    stakes, picks = kelly_stakes([[0.9, 0.05, 0.05]], [[3.0, 10.0, 20.0]], 1000, max_stake=0.05)
+    assert picks[0] == 0
+    np.testing.assert_allclose(stakes[0], 50.0)
+
+def test_round_exposure_cap():
+    n = 20
+    probs = np.tile([0.7, 0.2, 0.1], (n, 1))
+    odds = np.tile([2.0, 4.0, 8.0], (n, 1))
+    stakes, picks = kelly_stakes(probs, odds, 1000, max_stake=0.05, max_exposure=0.25)
+    assert (picks == 0).all()
+    assert stakes.max() <= 50.0 + 1e-9
+    np.testing.assert_allclose(stakes.sum(), 250.0, rtol=1e-6)
+    # Identical bets get identical stakes
+    np.testing.assert_allclose(stakes, stakes[0])
+
+def test_large_rounds_use_sampled_outcomes_within_the_caps():
+    rng = np.random.default_rng(0)
+    odds = rng.uniform(1.6, 5, (300, 3))
+    probs = np.clip(rng.uniform(0.95, 1.25, (300, 3)) / odds, 0, 1)
+    stakes, picks = kelly_stakes(probs, odds, 1000)
+    assert (picks >= 0).sum() > 100
+    assert stakes.max() <= 50.0 + 1e-9 and stakes.sum() <= 250.0 + 1e-6
+    np.testing.assert_array_equal(kelly_stakes(probs, odds, 1000)[0], stakes)
+
+def test_one_pick_per_fixture():
+    # Home and away both have an edge; the bigger one is backed
+    stakes, picks = kelly_stakes([[0.45, 0.20, 0.35]], [[2.5, 3.0, 3.2]], 1000)
+    assert picks[0] == 0 and stakes[0] > 0
+    # Draws are only backed when asked for, as in the backtest
+    probs, odds = [[0.30, 0.45, 0.25]], [[3.0, 3.0, 3.0]]
+    assert kelly_stakes(probs, odds, 1000)[1][0] == -1
+    assert kelly_stakes(probs, odds, 1000, outcomes=(0, 1, 2))[1][0] == 1
+    assert kelly_single(probs[0], odds[0], 1000)[1] == -1
+
+def test_no_bet_rows():
+    probs = np.array([[0.40, 0.30, 0.30], [np.nan] * 3, [0.55, 0.25, 0.20]])
+    odds = np.array([[2.0, 3.3, 3.3], [2.0, 3.3, 3.3], [2.1, 3.5, 4.0]])
+    stakes, picks = kelly_stakes(probs, odds, 1000)
+    assert list(picks) == [-1, -1, 0]
+    assert stakes[0] == 0 and stakes[1] == 0 and stakes[2] > 0
+
+    fixtures = pd.DataFrame(odds, columns=ODDS_COLS)
+    staked = stake_fixtures(fixtures, probs, 1000)
+    assert staked['Pick'].isna().tolist() == [True, True, False] and staked['Pick'].iloc[2] == 'H'
+    assert staked['Edge'].tolist()[:2] == [0.0, 0.0]
+    np.testing.assert_allclose(staked['Stake'], stakes)
+
+def test_batch_and_backtest_stake_the_same_round():
+    rng = np.random.default_rng(1)
+    odds = rng.uniform(1.6, 5, (10, 3))
+    probs = rng.dirichlet([4, 3, 3], 10)
+    fixtures = pd.DataFrame(odds, columns=ODDS_COLS)
+
+    staked = stake_fixtures(fixtures, probs, 1000)
+    _, ledger = evaluate_betting_strategy(fixtures, pd.Series(np.zeros(10, dtype=int)), probs,
+                                          staking='kelly', rounds=np.zeros(10), return_ledger=True)
+    placed = staked[staked['Stake'] > 0]
+    assert len(placed) == len(ledger) > 0
+    np.testing.assert_allclose(ledger['Stake'], placed['Stake'])
@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import HistGradientBoostingClassifier
+
+from src.tree_export import export_model, load_compact_model
+
+def _data(n_classes, n=600, seed=0):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(n, 5))
+    y = (X[:, 0] + 0.5 * X[:, 1] > 0).astype(int)
+    if n_classes == 3:
+        y = y + (X[:, 2] > 0.8)
+    # Missing values in training, so the trees learn where NaN goes
+    X[rng.random(X.shape) < 0.1] = np.nan
+    return pd.DataFrame(X, columns=[f'f{i}' for i in range(5)]), y
+
+@pytest.fixture(params=[2, 3], ids=['binary', 'multiclass'])
+def fitted(request):
+    X, y = _data(request.param)
+    model = HistGradientBoostingClassifier(max_iter=30, max_depth=4, random_state=0).fit(X, y)
+    return model, X
+
+def test_batch_matches_sklearn(fitted):
+    model, X = fitted
+    compact = export_model(model)
+    np.testing.assert_allclose(compact.predict_proba(X.to_numpy()), model.predict_proba(X), atol=1e-9)
+    np.testing.assert_array_equal(compact.predict(X.to_numpy()), model.predict(X))
+
+def test_single_row_matches_sklearn(fitted):
+    model, X = fitted
+    compact = export_model(model)
+    for i in range(20):
+        row = X.iloc[[i]]
+        np.testing.assert_allclose(compact.predict_proba(row.to_numpy()[0]), model.predict_proba(row), atol=1e-9)
+
+def test_nan_rows(fitted):
+    model, X = fitted
+    compact = export_model(model)
+    X_nan = X.iloc[:10].copy()
+    X_nan.iloc[:, ::2] = np.nan
+    X_nan.iloc[0] = np.nan
+    np.testing.assert_allclose(compact.predict_proba(X_nan.to_numpy()), model.predict_proba(X_nan), atol=1e-9)
+    np.testing.assert_allclose(compact.predict_proba(X_nan.to_numpy()[0]), model.predict_proba(X_nan.iloc[[0]]), atol=1e-9)
+
+def test_save_load_roundtrip(fitted, tmp_path):
+    model, X = fitted
+    path = tmp_path / 'model.npz'
+    export_model(model, str(path), X_check=X)
+    compact = load_compact_model(str(path))
+    assert compact.feature_names == list(X.columns)
+    np.testing.assert_array_equal(compact.classes_, model.classes_)
+    values = dict(zip(X.columns, X.iloc[3]))
+    np.testing.assert_allclose(compact.predict_proba(compact.vector(values)), model.predict_proba(X.iloc[[3]]), atol=1e-9)
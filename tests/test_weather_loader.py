@@ -0,0 +1,81 @@
+import threading
+import time
+
+import pytest
+
+from src import weather_loader
+from src.weather_loader import fetch_forecast, prefetch_forecasts, get_coords
+
+def _forecast(rain):
+    return {'Rain': rain, 'Temperature': 12.0, 'WindSpeed': 8.0}
+
+@pytest.fixture
+def forecast_requests(monkeypatch):
+    """Empty forecast cache and a stubbed _request_forecast; yields the calls made."""
+    monkeypatch.setattr(weather_loader, '_forecast_cache', weather_loader.OrderedDict())
+    monkeypatch.setattr(weather_loader, '_refreshing', set())
+    calls = []
+
+    def request(coords, start_date, end_date, retries=0):
+        calls.append((coords, start_date, end_date))
+        days = [start_date] if start_date == end_date else [start_date, end_date]
+        return {day: _forecast(float(len(calls))) for day in days}
+
+    monkeypatch.setattr(weather_loader, '_request_forecast', request)
+    return calls
+
+def test_fresh_hit_makes_no_request(forecast_requests):
+    first = fetch_forecast('Arsenal', '2026-10-24')
+    assert len(forecast_requests) == 1
+
+    assert fetch_forecast('Arsenal', '2026-10-24') == first
+    assert len(forecast_requests) == 1
+
+def test_stale_hit_returns_at_once_and_refreshes_once(forecast_requests, monkeypatch):
+    coords = get_coords('Arsenal')
+    weather_loader._forecast_cache[(coords, '2026-10-24')] = (time.time() - weather_loader.FORECAST_TTL - 1, _forecast(0.5))
+
+    started, release = threading.Event(), threading.Event()
+    stub = weather_loader._request_forecast
+
+    def slow_request(*args, **kwargs):
+        started.set()
+        release.wait(5)
+        return stub(*args, **kwargs)
+
+    monkeypatch.setattr(weather_loader, '_request_forecast', slow_request)
+
+    # Both calls get the stale value without waiting; only one refresh starts
+    assert fetch_forecast('Arsenal', '2026-10-24')['Rain'] == 0.5
+    assert started.wait(5)
+    assert fetch_forecast('Arsenal', '2026-10-24')['Rain'] == 0.5
+    release.set()
+
+    deadline = time.time() + 5
+    while weather_loader._refreshing and time.time() < deadline:
+        time.sleep(0.01)
+    assert forecast_requests == [(coords, '2026-10-24', '2026-10-24')]
+    assert fetch_forecast('Arsenal', '2026-10-24')['Rain'] == 1.0
+
+def test_cache_stays_within_size(forecast_requests, monkeypatch):
+    monkeypatch.setattr(weather_loader, 'FORECAST_CACHE_SIZE', 3)
+    coords = get_coords('Arsenal')
+
+    for day in ('2026-10-20', '2026-10-21', '2026-10-22'):
+        fetch_forecast('Arsenal', day)
+    fetch_forecast('Arsenal', '2026-10-20')  # hit: now the most recently used
+    fetch_forecast('Arsenal', '2026-10-23')
+
+    assert len(weather_loader._forecast_cache) == 3
+    assert list(weather_loader._forecast_cache) == [(coords, '2026-10-22'), (coords, '2026-10-20'), (coords, '2026-10-23')]
+
+def test_prefetch_makes_one_request_per_stadium(forecast_requests):
+    fixtures = [('Arsenal', '2026-10-24'), ('Chelsea', '2026-10-25'),
+                ('Arsenal', '2026-10-31'), ('Arsenal', '2026-10-27'), ('Nowhere FC', '2026-10-24')]
+    prefetch_forecasts(fixtures)
+
+    assert sorted(forecast_requests) == sorted([(get_coords('Arsenal'), '2026-10-24', '2026-10-31'),
+                                                 (get_coords('Chelsea'), '2026-10-25', '2026-10-25')])
+    # The prefetched days are now served from the cache
+    fetch_forecast('Arsenal', '2026-10-31')
+    assert len(forecast_requests) == 2